@@ -0,0 +1,431 @@
+"""
+Tokenizer for the [Events] section of .ass files.
+
+Every Dialogue/Comment line is split once according to the section's
+Format header into a compact Event record.
+"""
+
+import io
+import re
+import mmap
+import codecs
+from collections import namedtuple
+from operator import itemgetter
+
+CROSS_REFERENCE_PATTERN = re.compile(r"CR-(\d+)-\[([0-9,\s]+)\]")
+DEFAULT_EVENT_PATTERN = re.compile(
+    r"(Dialogue|Comment): *([^,]*),([^,]*),([^,]*),([^,]*),([^,]*),"
+    r"[^,]*,[^,]*,[^,]*,([^,]*),(.*)"
+)
+
+DEFAULT_FORMAT = (
+    "layer",
+    "start",
+    "end",
+    "style",
+    "name",
+    "marginl",
+    "marginr",
+    "marginv",
+    "effect",
+    "text",
+)
+
+EVENT_KINDS = ("Dialogue", "Comment")
+EVENT_PREFIXES = ("Dialogue:", "Comment:")
+
+_new_event = tuple.__new__
+ENCODINGS = ("utf-8-sig", "utf-8", "latin-1", "cp1252")
+
+EVENTS_HEADER = b"[Events]"
+
+
+class Event(
+    namedtuple("Event", "kind layer start_time end_time style name effect text")
+):
+    """
+    A single Dialogue/Comment line.
+    Timestamps are kept as written and converted to centiseconds on
+    access through start/end, since most callers never look at them.
+    """
+
+    __slots__ = ()
+
+    @property
+    def start(self):
+        return parse_time(self.start_time)
+
+    @property
+    def end(self):
+        return parse_time(self.end_time)
+
+    @property
+    def is_comment(self):
+        return self.kind == "Comment"
+
+
+def parse_time(value):
+    """
+    Converts an H:MM:SS.cc timestamp to centiseconds.
+    Returns None when the value is not a valid timestamp.
+    """
+    try:
+        hours, minutes, seconds = value.split(":")
+        seconds, _, fraction = seconds.partition(".")
+        centiseconds = int((fraction + "00")[:2])
+        return (
+            int(hours) * 360000
+            + int(minutes) * 6000
+            + int(seconds) * 100
+            + centiseconds
+        )
+    except ValueError:
+        return None
+
+
+def format_time(centiseconds):
+    hours, rest = divmod(centiseconds, 360000)
+    minutes, rest = divmod(rest, 6000)
+    seconds, centiseconds = divmod(rest, 100)
+    return f"{hours}:{minutes:02d}:{seconds:02d}.{centiseconds:02d}"
+
+
+def normalize_text(text):
+    """
+    Replaces \\N line breaks with spaces and collapses whitespace.
+    str.split() uses the same notion of whitespace as the \\s regex
+    class, so this matches the old re.sub based version.
+    """
+    if not text:
+        return ""
+    return " ".join(text.replace("\\N", " ").split())
+
+
+def parse_cross_reference(value):
+    """
+    Finds the first CR-XX-[N,...] tag in value.
+    Returns (folder, line_numbers) or (None, None).
+    """
+    match = CROSS_REFERENCE_PATTERN.search(value)
+    if match:
+        folder = match.group(1).zfill(2)
+        line_numbers = [int(x) for x in match.group(2).split(",") if x.strip()]
+        return folder, line_numbers
+    return None, None
+
+
+def find_cross_reference(event):
+    for value in (event.name, event.effect, event.text):
+        if value and "CR-" in value:
+            folder, line_numbers = parse_cross_reference(value)
+            if folder:
+                return folder, line_numbers
+    return None, None
+
+
+def parse_format(line):
+    _, _, fields = line.partition(":")
+    return tuple(field.strip().lower() for field in fields.split(","))
+
+
+class EventTokenizer:
+    """
+    Splits event lines according to a Format header.
+    Field positions are resolved once per header, not once per line.
+    The standard Aegisub header uses a single precompiled pattern.
+    """
+
+    def __init__(self, format_fields=DEFAULT_FORMAT):
+        self.field_count = len(format_fields)
+        self._fast = tuple(format_fields) == DEFAULT_FORMAT
+        positions = {field: idx for idx, field in enumerate(format_fields)}
+        # Missing fields point to the padding slot after the last value
+        missing = self.field_count
+        self._pick = itemgetter(
+            *(
+                positions.get(field, missing)
+                for field in ("layer", "start", "end", "style", "name", "effect")
+            )
+        )
+        self._text = positions.get("text", missing)
+
+    def tokenize(self, line):
+        """
+        Returns an Event for a Dialogue/Comment line, or None for
+        any other line.
+        """
+        if self._fast:
+            match = DEFAULT_EVENT_PATTERN.match(line)
+            if match is not None:
+                kind, layer, start, end, style, name, effect, text = match.groups()
+                return _new_event(
+                    Event,
+                    (
+                        kind,
+                        _to_int(layer),
+                        start,
+                        end,
+                        style,
+                        name,
+                        effect,
+                        text.strip(),
+                    ),
+                )
+
+        kind, sep, rest = line.partition(":")
+        if not sep or kind not in EVENT_KINDS:
+            return None
+
+        values = rest.split(",", self.field_count - 1)
+        if len(values) == self.field_count:
+            text = values[self._text].strip()
+        else:
+            text = ""
+            values.extend([""] * (self.field_count - len(values)))
+        values.append("")
+
+        layer, start, end, style, name, effect = self._pick(values)
+        return _new_event(
+            Event, (kind, _to_int(layer), start, end, style, name, effect, text)
+        )
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def parse_events(lines):
+    """
+    Returns every Dialogue/Comment line after the [Events] Format
+    header as a list of Event, in file order.
+    """
+    events = []
+    tokenizer = None
+    in_events = False
+
+    for line in lines:
+        if line.startswith("["):
+            in_events = line.strip() == "[Events]"
+            continue
+
+        if not in_events:
+            continue
+
+        if line.startswith(EVENT_PREFIXES):
+            if tokenizer:
+                events.append(tokenizer.tokenize(line))
+        elif line.startswith("Format:"):
+            tokenizer = EventTokenizer(parse_format(line))
+
+    return events
+
+
+def event_line_positions(lines):
+    """
+    Returns the index in lines of every event parse_events would
+    return, so callers can edit event lines in place.
+    """
+    positions = []
+    has_format = False
+    in_events = False
+
+    for idx, line in enumerate(lines):
+        if line.startswith("["):
+            in_events = line.strip() == "[Events]"
+            continue
+
+        if not in_events:
+            continue
+
+        if line.startswith(EVENT_PREFIXES):
+            if has_format:
+                positions.append(idx)
+        elif line.startswith("Format:"):
+            has_format = True
+
+    return positions
+
+
+Style = namedtuple("Style", "name fontname bold italic")
+Document = namedtuple("Document", "info styles events")
+
+STYLE_SECTIONS = ("[V4+ Styles]", "[V4 Styles]")
+
+
+def parse_style(line, format_fields):
+    """
+    Returns a Style for a "Style:" line, or None when it has fewer
+    values than its Format header.
+    """
+    _, _, rest = line.partition(":")
+    values = [value.strip() for value in rest.split(",", len(format_fields) - 1)]
+    if len(values) != len(format_fields):
+        return None
+
+    fields = dict(zip(format_fields, values))
+    return Style(
+        fields.get("name", ""),
+        fields.get("fontname", ""),
+        _to_int(fields.get("bold", "0")) != 0,
+        _to_int(fields.get("italic", "0")) != 0,
+    )
+
+
+def parse_document(lines):
+    """
+    Parses [Script Info], the styles section and [Events] in one pass.
+    info maps header names to values, styles maps style names to Style
+    and events is the same list parse_events returns.
+    """
+    info = {}
+    styles = {}
+    events = []
+    section = None
+    style_format = None
+    tokenizer = None
+
+    for line in lines:
+        if line.startswith("["):
+            section = line.strip()
+            continue
+
+        if section == "[Events]":
+            if line.startswith(EVENT_PREFIXES):
+                if tokenizer:
+                    events.append(tokenizer.tokenize(line))
+            elif line.startswith("Format:"):
+                tokenizer = EventTokenizer(parse_format(line))
+        elif section in STYLE_SECTIONS:
+            if line.startswith("Style:"):
+                if style_format:
+                    style = parse_style(line, style_format)
+                    if style:
+                        styles[style.name] = style
+            elif line.startswith("Format:"):
+                style_format = parse_format(line)
+        elif section == "[Script Info]":
+            if line.startswith(";"):
+                continue
+            key, sep, value = line.partition(":")
+            if sep:
+                info[key.strip()] = value.strip()
+
+    return Document(info, styles, events)
+
+
+def read_ass_source(file_path):
+    """
+    Reads a file for rewriting: line endings are kept as they are and
+    the detected encoding is returned along with the lines.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return [], None
+
+    for encoding in ENCODINGS:
+        # utf-8-sig would also decode a file without a BOM, and then
+        # write one back on save
+        if encoding == "utf-8-sig" and not data.startswith(codecs.BOM_UTF8):
+            continue
+        try:
+            text = data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+        return io.StringIO(text, newline="").readlines(), encoding
+    return [], None
+
+
+def write_ass_source(file_path, lines, encoding):
+    with open(file_path, "w", encoding=encoding, newline="") as f:
+        f.writelines(lines)
+
+
+def read_ass_file(file_path):
+    for encoding in ENCODINGS:
+        try:
+            with open(file_path, "r", encoding=encoding) as f:
+                return f.readlines()
+        except (OSError, UnicodeDecodeError):
+            continue
+    return []
+
+
+def _next_section(data, position):
+    """
+    Returns the offset of the next line starting with "[", or the end
+    of data. A single byte find runs at memchr speed, which searching
+    for b"\\n[" does not, and "[" is rare inside event lines.
+    """
+    position = data.find(b"[", position)
+    while position != -1:
+        if data[position - 1 : position] == b"\n":
+            return position
+        position = data.find(b"[", position + 1)
+    return len(data)
+
+
+def _event_regions(data):
+    """
+    Yields (start, end) byte offsets of every [Events] section body,
+    from the end of its header line up to the next section header.
+    """
+    position = data.find(EVENTS_HEADER)
+    while position != -1:
+        line_end = data.find(b"\n", position)
+        if line_end == -1:
+            line_end = len(data)
+
+        header = data[position:line_end]
+        at_line_start = position == 0 or data[position - 1 : position] in b"\r\n"
+        if at_line_start and header.strip() == EVENTS_HEADER:
+            end = _next_section(data, line_end)
+            yield line_end, end
+        else:
+            end = line_end
+
+        position = data.find(EVENTS_HEADER, end)
+
+
+def read_event_lines(file_path):
+    """
+    Yields the [Events] header and the lines of its section, without
+    line endings, skipping everything else in the file undecoded.
+    The file is mapped once and only the event regions are decoded,
+    as UTF-8 (after a BOM if there is one) with a latin-1 fallback.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # mmap refuses empty files
+        return
+
+    with data:
+        offset = len(codecs.BOM_UTF8) if data[:3] == codecs.BOM_UTF8 else 0
+        encoding = "utf-8"
+        for start, end in _event_regions(data):
+            # Decoding straight from the mapping avoids a bytes copy; the
+            # view has to be released before the mapping is closed
+            with memoryview(data)[max(start, offset) : end] as region:
+                try:
+                    text = str(region, encoding)
+                except UnicodeDecodeError:
+                    encoding = "latin-1"
+                    text = str(region, encoding)
+
+            # Universal newlines, as when reading in text mode.
+            # str.splitlines() would also split on \x85 and friends
+            if "\r" in text:
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+            yield "[Events]"
+            yield from text.split("\n")
+
+
+def load_events(file_path):
+    return parse_events(read_event_lines(file_path))
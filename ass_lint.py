@@ -0,0 +1,462 @@
+"""
+Lint checks for the episode .ass files.
+
+Every file is read and parsed once into an ass_events Document, then
+handed to each registered rule. Rules are plain functions registered
+with @rule and yield (line, message) pairs, where line is the event
+number after the [Events] Format header (the same numbering the
+CR-XX-[N] tags use) or None for file level issues.
+"""
+
+import re
+import sys
+import time
+import tomllib
+import argparse
+from fnmatch import fnmatch
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from ass_events import parse_document, read_ass_file
+from ass_terms import TermChecker, load_terms
+
+try:
+    from fontTools.ttLib import TTCollection, TTFont
+except ImportError:
+    TTFont = None
+
+OVERRIDE_BLOCK_PATTERN = re.compile(r"\{[^}]*\}")
+FONT_NAME_PATTERN = re.compile(r"\\fn([^\\}]*)")
+RESET_STYLE_PATTERN = re.compile(r"\\r([^\\}]+)")
+DRAWING_PATTERN = re.compile(r"\\p[1-9]")
+PLACEMENT_PATTERN = re.compile(r"\\(?:pos|move|an[1-9])")
+
+DEFAULT_MAX_CPS = 25
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc", ".otc")
+
+# Name table ids for the family, full and typographic family names
+FONT_NAME_IDS = (1, 4, 16)
+
+RULES = {}
+
+
+class Rule:
+    def __init__(self, name, func, description, severity, scope):
+        self.name = name
+        self.func = func
+        self.description = description
+        self.severity = severity
+        self.scope = scope
+
+    def applies_to(self, file_name):
+        return fnmatch(file_name, self.scope)
+
+
+def rule(name, description, severity="error", scope="*.ass"):
+    """
+    Registers a rule function under name.
+    scope is a file name pattern, so dialogue-only checks can skip the
+    typesetting files.
+    """
+
+    def register(func):
+        RULES[name] = Rule(name, func, description, severity, scope)
+        return func
+
+    return register
+
+
+def plain_text(text):
+    return OVERRIDE_BLOCK_PATTERN.sub("", text).replace("\\N", " ").replace("\\h", " ")
+
+
+def dialogue_events(document):
+    """
+    Yields (line, event) for every Dialogue event with visible text,
+    leaving out drawings.
+    """
+    for line, event in enumerate(document.events, 1):
+        if event.is_comment or not event.text or DRAWING_PATTERN.search(event.text):
+            continue
+        yield line, event
+
+
+@rule(
+    "overlap",
+    "Dialogue lines with the same style and layer that overlap in time",
+    severity="warning",
+    scope="dialog*.ass",
+)
+def check_overlaps(document, context):
+    last_by_track = {}
+    timed = sorted(
+        (event.start, event.end, line, event)
+        for line, event in dialogue_events(document)
+        # Lines placed on purpose are meant to share the screen
+        if not PLACEMENT_PATTERN.search(event.text)
+    )
+
+    for start, end, line, event in timed:
+        if start is None or end is None:
+            continue
+        track = (event.style, event.layer)
+        previous = last_by_track.get(track)
+        if previous and start < previous[0]:
+            yield line, f"Overlaps line {previous[1]} ({event.style})"
+        if not previous or end > previous[0]:
+            last_by_track[track] = (end, line)
+
+
+@rule(
+    "cps",
+    "Dialogue lines above the reading speed limit",
+    severity="warning",
+    scope="dialog*.ass",
+)
+def check_cps(document, context):
+    max_cps = context["max_cps"]
+    for line, event in dialogue_events(document):
+        start, end = event.start, event.end
+        if start is None or end is None or end <= start:
+            continue
+
+        # Whitespace and punctuation do not count, as in Aegisub
+        characters = sum(1 for char in plain_text(event.text) if char.isalnum())
+        cps = characters * 100 / (end - start)
+        if cps > max_cps:
+            yield line, f"{cps:.1f} characters per second (limit {max_cps:g})"
+
+
+@rule("undefined-style", "Styles used by events or \\r tags that are not defined")
+def check_undefined_styles(document, context):
+    for line, event in enumerate(document.events, 1):
+        if event.style not in document.styles:
+            yield line, f"Style '{event.style}' is not defined"
+        for name in RESET_STYLE_PATTERN.findall(event.text):
+            if name.strip() not in document.styles:
+                yield line, f"Style '{name.strip()}' in \\r is not defined"
+
+
+@rule("missing-font", "Fonts used in \\fn tags that are not in the fonts folder")
+def check_missing_fonts(document, context):
+    available = context["fonts"]
+    if available is None:
+        return
+
+    # One issue per font, on the first line that uses it
+    missing = {}
+    for line, event in enumerate(document.events, 1):
+        if event.is_comment:
+            continue
+        for name in FONT_NAME_PATTERN.findall(event.text):
+            name = name.strip().lstrip("@")
+            if name and name.lower() not in available:
+                first_line, count = missing.get(name, (line, 0))
+                missing[name] = (first_line, count + 1)
+
+    for name, (line, count) in missing.items():
+        yield line, f"Font '{name}' is not in the fonts folder ({count} lines)"
+
+
+@rule("playres", "PlayResX/PlayResY that do not match the config resolution")
+def check_playres(document, context):
+    resolution = context["resolution"]
+    if resolution is None:
+        return
+
+    actual = (document.info.get("PlayResX"), document.info.get("PlayResY"))
+    expected = tuple(str(value) for value in resolution)
+    if actual != expected:
+        yield None, (
+            f"PlayRes is {actual[0] or '?'}x{actual[1] or '?'}, "
+            f"config resolution is {expected[0]}x{expected[1]}"
+        )
+
+
+@rule(
+    "terms",
+    "Known misspellings, wrong casing and near misses of the terms in terms.txt",
+    severity="warning",
+)
+def check_terms(document, context):
+    checker = context["terms"]
+    if checker is None:
+        return
+
+    # Near misses are often deliberate, so each spelling is reported
+    # once per episode, on the first line that uses it
+    reported = context["episode"].setdefault("terms", set())
+    near_misses = {}
+    for line, event in dialogue_events(document):
+        for found, canonical, kind in checker.check(plain_text(event.text)):
+            if kind == "variant":
+                yield line, f"'{found}' should be written '{canonical}'"
+            elif found not in reported:
+                first_line, count = near_misses.get((found, canonical), (line, 0))
+                near_misses[(found, canonical)] = (first_line, count + 1)
+
+    for (found, canonical), (line, count) in near_misses.items():
+        reported.add(found)
+        yield line, (
+            f"'{found}' looks like a misspelling of '{canonical}' ({count} lines)"
+        )
+
+
+def parse_range(range_str):
+    if "-" in range_str:
+        start, end = range_str.split("-")
+        return list(range(int(start), int(end) + 1))
+    else:
+        return [int(range_str)]
+
+
+def font_family_names(font_path):
+    """
+    Returns the lowercased family, full and typographic family names of
+    every face in a font file.
+    """
+    if font_path.suffix.lower() in (".ttc", ".otc"):
+        fonts = TTCollection(str(font_path), lazy=True).fonts
+    else:
+        fonts = [TTFont(str(font_path), lazy=True)]
+
+    names = set()
+    for font in fonts:
+        for record in font["name"].names:
+            if record.nameID in FONT_NAME_IDS:
+                try:
+                    names.add(record.toUnicode().strip().lower())
+                except UnicodeDecodeError:
+                    continue
+    return names
+
+
+def load_font_names(fonts_dir):
+    """
+    Returns every font name available in fonts_dir, or None when the
+    folder is missing or fontTools is not installed.
+    """
+    if TTFont is None:
+        print("fontTools is not installed, skipping missing-font", file=sys.stderr)
+        return None
+    if not fonts_dir.is_dir():
+        return None
+
+    names = set()
+    for font_path in sorted(fonts_dir.rglob("*")):
+        if font_path.suffix.lower() in FONT_EXTENSIONS:
+            try:
+                names.update(font_family_names(font_path))
+            except Exception as e:
+                print(f"Could not read font {font_path}: {e}", file=sys.stderr)
+    return names
+
+
+def load_resolution(config_path):
+    if not config_path.is_file():
+        return None
+    with open(config_path, "rb") as f:
+        return tuple(tomllib.load(f).get("resolution", ())) or None
+
+
+def lint_file(file_path, rules, context, timings):
+    """
+    Parses file_path once and runs every rule that applies to it.
+    Returns a list of issue dicts; time spent per rule is added to
+    timings, with the shared parse counted under "parse".
+    """
+    start = time.perf_counter()
+    document = parse_document(read_ass_file(file_path))
+    timings["parse"] = timings.get("parse", 0.0) + time.perf_counter() - start
+
+    issues = []
+    for lint_rule in rules:
+        if not lint_rule.applies_to(file_path.name):
+            continue
+
+        start = time.perf_counter()
+        for line, message in lint_rule.func(document, context):
+            issues.append(
+                {
+                    "file": str(file_path),
+                    "line": line,
+                    "rule": lint_rule.name,
+                    "severity": lint_rule.severity,
+                    "message": message,
+                }
+            )
+        elapsed = time.perf_counter() - start
+        timings[lint_rule.name] = timings.get(lint_rule.name, 0.0) + elapsed
+
+    return issues
+
+
+def lint_folder(base_path, folder_num, rule_names, context):
+    folder = Path(base_path) / f"{folder_num:02d}"
+    rules = [RULES[name] for name in rule_names]
+    # Rules can keep state across the files of one episode here
+    context = {**context, "episode": {}}
+    timings = {}
+    issues = []
+    files = sorted(folder.glob("*.ass")) if folder.is_dir() else []
+
+    for file_path in files:
+        issues.extend(lint_file(file_path, rules, context, timings))
+    return issues, timings, len(files)
+
+
+def iter_lint_results(base_path, folder_range, rule_names, context, jobs=1):
+    """
+    Yields (issues, timings, file_count) per folder, in folder order.
+    """
+    count = len(folder_range)
+    if jobs == 1 or count < 2:
+        for folder_num in folder_range:
+            yield lint_folder(base_path, folder_num, rule_names, context)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(
+            lint_folder,
+            [base_path] * count,
+            folder_range,
+            [rule_names] * count,
+            [context] * count,
+        )
+
+
+def format_issue(issue):
+    location = issue["file"]
+    if issue["line"] is not None:
+        location += f":{issue['line']}"
+    return f"{location}: {issue['severity']} [{issue['rule']}] {issue['message']}"
+
+
+def print_timings(timings, file_count):
+    total = sum(timings.values())
+    print(f"\nFiles linted: {file_count}", file=sys.stderr)
+    print(f"{'Rule':<18}{'Time':>10}{'Share':>8}", file=sys.stderr)
+    for name, elapsed in sorted(timings.items(), key=lambda item: -item[1]):
+        share = elapsed / total * 100 if total else 0.0
+        print(f"{name:<18}{elapsed * 1000:>8.1f}ms{share:>7.1f}%", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Lint .ass files in numbered episode folders",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python ass_lint.py episodes/ 1-37
+  python ass_lint.py episodes/ 1-37 --jobs 4
+  python ass_lint.py episodes/ 1-37 --rules cps,overlap --max-cps 21
+  python ass_lint.py episodes/ 1-37 --fail-on-issues
+
+Rules:
+"""
+        + "\n".join(f"  {name:<16}- {RULES[name].description}" for name in RULES)
+        + """
+
+Defaults:
+  Fonts are looked up in <path>/../common/fonts
+  The resolution is read from <path>/../config.toml
+  Terms are read from <path>/../common/terms.txt
+
+Exit Codes:
+  0 - Success (no errors or --fail-on-issues not set)
+  1 - Failure (found error level issues when --fail-on-issues is set)
+        """,
+    )
+
+    parser.add_argument(
+        "path", help="Path to the folder containing numbered episode folders"
+    )
+    parser.add_argument("range", help="Folder range (e.g., 1, 1-5, 1-10)")
+    parser.add_argument(
+        "--rules",
+        default=",".join(RULES),
+        help="Comma separated rules to run (default: all)",
+    )
+    parser.add_argument(
+        "--max-cps",
+        type=float,
+        default=DEFAULT_MAX_CPS,
+        help=f"Reading speed limit in characters per second (default: {DEFAULT_MAX_CPS})",
+    )
+    parser.add_argument("--fonts", help="Fonts folder for missing-font")
+    parser.add_argument("--config", help="config.toml with the target resolution")
+    parser.add_argument("--terms", help="Terms file for terms")
+    parser.add_argument(
+        "--fail-on-issues",
+        action="store_true",
+        help="Exit with code 1 if error level issues are found",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Lint episode folders in this many worker processes (default: 1)",
+    )
+
+    args = parser.parse_args()
+
+    base_path = Path(args.path)
+    if not base_path.is_dir():
+        print(f"Error: Path '{args.path}' does not exist")
+        sys.exit(1)
+
+    try:
+        folder_range = parse_range(args.range)
+    except ValueError:
+        print(f"Error: Invalid range '{args.range}'")
+        sys.exit(1)
+
+    rule_names = [name.strip() for name in args.rules.split(",") if name.strip()]
+    unknown = [name for name in rule_names if name not in RULES]
+    if unknown:
+        print(f"Error: Unknown rule(s): {', '.join(unknown)}")
+        sys.exit(1)
+
+    project_dir = base_path.resolve().parent
+    context = {
+        "max_cps": args.max_cps,
+        "fonts": None,
+        "resolution": None,
+        "terms": None,
+    }
+    if "missing-font" in rule_names:
+        fonts_dir = Path(args.fonts) if args.fonts else project_dir / "common/fonts"
+        context["fonts"] = load_font_names(fonts_dir)
+    if "playres" in rule_names:
+        config_path = Path(args.config) if args.config else project_dir / "config.toml"
+        context["resolution"] = load_resolution(config_path)
+    if "terms" in rule_names:
+        terms_path = (
+            Path(args.terms) if args.terms else project_dir / "common/terms.txt"
+        )
+        if terms_path.is_file():
+            context["terms"] = TermChecker(load_terms(terms_path))
+
+    counts = {"error": 0, "warning": 0}
+    timings = {}
+    file_count = 0
+    for issues, folder_timings, folder_files in iter_lint_results(
+        base_path, folder_range, rule_names, context, args.jobs
+    ):
+        for issue in issues:
+            counts[issue["severity"]] += 1
+            print(format_issue(issue))
+        for name, elapsed in folder_timings.items():
+            timings[name] = timings.get(name, 0.0) + elapsed
+        file_count += folder_files
+
+    print(f"\nErrors: {counts['error']} | Warnings: {counts['warning']}")
+    print_timings(timings, file_count)
+
+    if args.fail_on_issues and counts["error"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Terminology checks against common/terms.txt.
+
+Every canonical term and known variant is compiled into one
+Aho-Corasick automaton, so a line is scanned once no matter how many
+terms there are. Words the automaton does not cover are compared
+against terms of the same word count to catch unknown misspellings. Plural
+and gender forms of a term ("Ondas de Bestas", "Vice-Capitão") are
+not misspellings and are left alone.
+
+terms.txt holds one canonical term per line. Known misspellings can
+be listed after an equals sign:
+
+    Night Raider = Nightraider, Night Rider
+"""
+
+import re
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+(?:[-'][^\W\d_]+)*")
+
+# Shorter terms are too close to ordinary words for near-miss checks
+NEAR_MISS_MIN_LENGTH = 6
+
+# Portuguese plural and gender endings mapped to a common form
+INFLECTION_SUFFIXES = (
+    ("ões", "ão"),
+    ("ães", "ão"),
+    ("ãos", "ão"),
+    ("ãs", "ão"),
+    ("ã", "ão"),
+    ("s", ""),
+)
+
+
+class TermAutomaton:
+    """
+    Aho-Corasick automaton over lowercased keys.
+    find() yields (start, end, key) for every occurrence, including
+    overlapping ones.
+    """
+
+    def __init__(self, keys):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        for key in keys:
+            node = 0
+            for char in key:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                node = next_node
+            self.output[node].append(key)
+
+        # Breadth-first, so every fail target is finished before use
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for char, next_node in self.goto[node].items():
+                queue.append(next_node)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_node] = target if target != next_node else 0
+                self.output[next_node] = (
+                    self.output[next_node] + self.output[self.fail[next_node]]
+                )
+
+    def find(self, text):
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        node = 0
+
+        for idx, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for key in output[node]:
+                yield idx + 1 - len(key), idx + 1, key
+
+
+def edit_distance(a, b, limit):
+    """
+    Levenshtein distance between a and b, or limit + 1 as soon as it is
+    known to be larger than limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def max_distance(term):
+    return 1 if len(term) < 9 else 2
+
+
+def inflection_stem(phrase):
+    """
+    Returns phrase with the inflection of every word, hyphenated parts
+    included, reduced to a common form.
+    """
+    stems = []
+    for word in re.split(r"([\s-]+)", phrase):
+        for suffix, replacement in INFLECTION_SUFFIXES:
+            # Short words are left alone so "de" and "os" stay distinct
+            if word.endswith(suffix) and len(word) > len(suffix) + 2:
+                word = word[: -len(suffix)] + replacement
+                break
+        stems.append(word)
+    return "".join(stems)
+
+
+def load_terms(file_path):
+    """
+    Returns {canonical: [variants]} from a terms file.
+    """
+    terms = {}
+    with open(file_path, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            canonical, _, variants = line.partition("=")
+            terms[canonical.strip()] = [
+                variant.strip() for variant in variants.split(",") if variant.strip()
+            ]
+    return terms
+
+
+class TermChecker:
+    """
+    Finds known variants, wrongly cased terms and near-miss spellings
+    of the canonical terms in a piece of plain text.
+    """
+
+    def __init__(self, terms):
+        self.canonical = {}
+        for term, variants in terms.items():
+            self.canonical[term.lower()] = term
+            for variant in variants:
+                self.canonical[variant.lower()] = term
+
+        self.automaton = TermAutomaton(self.canonical)
+
+        # Near-miss candidates bucketed by word count and first letter
+        self.buckets = {}
+        for term in terms:
+            if len(term) < NEAR_MISS_MIN_LENGTH:
+                continue
+            key = (len(term.split()), term[0].lower())
+            self.buckets.setdefault(key, []).append(
+                (term, term.lower(), inflection_stem(term.lower()))
+            )
+        self.max_words = max((count for count, _ in self.buckets), default=0)
+        self._near_misses = {}
+
+    def _exact_matches(self, text):
+        """
+        Returns non-overlapping (start, end, key) matches on word
+        boundaries, preferring the longest match at each position.
+        """
+        lowered = text.lower()
+        matches = []
+        for start, end, key in self.automaton.find(lowered):
+            if start > 0 and lowered[start - 1].isalnum():
+                continue
+            if end < len(lowered) and lowered[end].isalnum():
+                continue
+            matches.append((start, end, key))
+
+        matches.sort(key=lambda match: (match[0], -(match[1] - match[0])))
+        selected = []
+        covered_until = 0
+        for start, end, key in matches:
+            if start >= covered_until:
+                selected.append((start, end, key))
+                covered_until = end
+        return selected
+
+    def check(self, text):
+        """
+        Yields (found, canonical, kind) where kind is "variant" for a
+        listed misspelling or different casing, and "near-miss" for an
+        unlisted spelling close to a canonical term.
+        """
+        matches = self._exact_matches(text)
+        covered = []
+        for start, end, key in matches:
+            covered.append((start, end))
+            found = text[start:end]
+            canonical = self.canonical[key]
+            if found != canonical:
+                yield found, canonical, "variant"
+
+        if not self.buckets:
+            return
+
+        words = list(WORD_PATTERN.finditer(text))
+        free = [
+            not any(start <= word.start() < end for start, end in covered)
+            for word in words
+        ]
+        for idx, word in enumerate(words):
+            if not free[idx] or not word.group()[0].isupper():
+                continue
+
+            span = [word]
+            for count in range(1, self.max_words + 1):
+                if count > 1:
+                    # Only words next to each other in the text form a
+                    # phrase, not ones separated by punctuation or a term
+                    following = idx + count - 1
+                    if following >= len(words) or not free[following]:
+                        break
+                    gap = text[span[-1].end() : words[following].start()]
+                    if not gap.isspace():
+                        break
+                    span.append(words[following])
+
+                candidates = self.buckets.get((count, word.group()[0].lower()))
+                if not candidates:
+                    continue
+
+                phrase = " ".join(match.group() for match in span).lower()
+                term = self._near_miss(phrase, candidates)
+                if term:
+                    yield text[span[0].start() : span[-1].end()], term, "near-miss"
+                    break
+
+    def _near_miss(self, phrase, candidates):
+        # Names repeat all through an episode, so each phrase is only
+        # compared against the terms once
+        if phrase in self._near_misses:
+            return self._near_misses[phrase]
+
+        found = None
+        stem = inflection_stem(phrase)
+        for term, lowered, term_stem in candidates:
+            # A cut off term is usually a different word ("Night Raid"
+            # as an episode title), not a typo
+            if lowered.startswith(phrase) or stem == term_stem:
+                continue
+            limit = max_distance(term)
+            if 0 < edit_distance(phrase, lowered, limit) <= limit:
+                found = term
+                break
+
+        self._near_misses[phrase] = found
+        return found
@@ -0,0 +1,706 @@
+"""
+Benchmarks for the subtitle tooling on synthetic seasons.
+
+A season is generated in the same layout as a real project
+(config.toml, episodes/NN/dialogs.ass and types.ass, common/songs and
+common/terms.txt), then every scenario is timed against it. Scenarios
+are plain functions registered with @scenario; they get the project
+folder and the episode list and return the number of items processed.
+"""
+
+import sys
+import json
+import time
+import random
+import logging
+import platform
+import argparse
+import importlib
+import statistics
+import tempfile
+from pathlib import Path
+
+from ass_events import format_time, load_events, parse_document, read_ass_file
+
+SCENARIOS = {}
+RESULTS_VERSION = 1
+
+DEFAULT_EPISODES = 25
+DEFAULT_EVENTS = 300
+DEFAULT_CR_DENSITY = 0.05
+DEFAULT_TYPESET_EVENTS = 150
+DEFAULT_COMPLEXITY = 4
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 10.0
+
+WORDS = (
+    "que não você eu ele ela nós isso aqui agora então mas porque quando "
+    "onde como tudo nada ainda sempre nunca muito pouco grande novo mundo "
+    "vida tempo lugar cidade noite dia luz sombra força poder verdade "
+    "medo coragem amigo inimigo batalha missão equipe base ordem sinal "
+    "monstro gigante ataque defesa perigo salvar proteger lutar correr "
+    "esperar voltar entender acreditar conhecer lembrar esquecer"
+).split()
+
+TERMS = (
+    "Night Raider",
+    "Mizorogi Shinya",
+    "Komon Kazuki",
+    "Saijyo Nagi",
+    "Chrome Chester Alpha",
+    "Ondas de Besta",
+    "Vice-Capitã",
+    "Dark Faust",
+)
+
+FONTS = ("Arial", "Built Titling Rg", "FOT-Rodin Pro EB", "URW Antiqua T")
+
+SCRIPT_INFO = """[Script Info]
+ScriptType: v4.00+
+WrapStyle: 0
+ScaledBorderAndShadow: yes
+YCbCr Matrix: TV.709
+PlayResX: 1920
+PlayResY: 1080
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+"""
+
+EVENTS_HEADER = """
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+CONFIG_TEMPLATE = """show_name = "Benchmark"
+fansub_group = "Benchmark Fansub"
+video_source = "TV-Rip"
+audio_language = "Japanese"
+audio_lang_code = "jpn"
+sub_language = "Portuguese"
+sub_lang_code = "pt"
+tmdb_id = 0
+ycbcr_matrix = "TV.709"
+resolution = [1920, 1080]
+
+translation = "Benchmark"
+editing = "Benchmark"
+translation_checking = "Benchmark"
+timing = "Benchmark"
+typesetting = "Benchmark"
+quality_checking = "Benchmark"
+
+episodes_path = "./episodes"
+extras_path = "./common/songs"
+output_path = "./muxed"
+
+episodes = "1...{episodes}"
+
+[extras.merge."1-{episodes}"]
+"opening_01.ass" = {{ from = "opsync", to = "sync" }}
+"ending_01.ass" = {{ from = "edsync", to = "sync" }}
+"""
+
+
+class SeasonSpec:
+    """
+    Parameters of a synthetic season. The same spec and seed always
+    produce the same files, so results stay comparable between runs.
+    """
+
+    def __init__(
+        self,
+        episodes=DEFAULT_EPISODES,
+        events=DEFAULT_EVENTS,
+        cr_density=DEFAULT_CR_DENSITY,
+        typeset_events=DEFAULT_TYPESET_EVENTS,
+        complexity=DEFAULT_COMPLEXITY,
+        seed=0,
+    ):
+        self.episodes = episodes
+        self.events = events
+        self.cr_density = cr_density
+        self.typeset_events = typeset_events
+        self.complexity = complexity
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def style_line(name, fontname, size, italic=False, alignment=2):
+    return (
+        f"Style: {name},{fontname},{size},&H00FFFFFF,&H000000FF,&H00000000,"
+        f"&H00000000,0,{-1 if italic else 0},0,0,100,100,0,0,1,2,1,"
+        f"{alignment},40,40,50,1\n"
+    )
+
+
+def event_line(kind, start, end, style, text, name="", effect="", layer=0):
+    return (
+        f"{kind}: {layer},{format_time(start)},{format_time(end)},{style},"
+        f"{name},0,0,0,{effect},{text}\n"
+    )
+
+
+def random_sentence(rng):
+    words = rng.choices(WORDS, k=rng.randint(3, 12))
+    if rng.random() < 0.2:
+        words.insert(rng.randrange(len(words)), rng.choice(TERMS))
+    sentence = " ".join(words)
+    if len(sentence) > 42 and rng.random() < 0.5:
+        middle = sentence.find(" ", len(sentence) // 2)
+        if middle != -1:
+            sentence = sentence[:middle] + "\\N" + sentence[middle + 1 :]
+    return sentence[0].upper() + sentence[1:] + rng.choice((".", "!", "?", "..."))
+
+
+def mutate(text, rng):
+    """
+    Returns text with one word changed, so some references end up
+    SIMILAR or DIFFERENT instead of EXACT.
+    """
+    words = text.split(" ")
+    words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return " ".join(words)
+
+
+def generate_dialogs(rng, spec, previous):
+    """
+    Returns (lines, texts) for one dialogs.ass. texts holds the text of
+    every event by line number, so later episodes can reference it.
+    """
+    events = []
+    texts = []
+
+    def add(line, text=None):
+        events.append(line)
+        texts.append(text)
+
+    add(event_line("Comment", 0, 300, "Default", "{Introdução} = Intro", "chptr"))
+    time_cs = 300
+    opsync_at = min(spec.events // 10, 20)
+    edsync_at = spec.events - min(spec.events // 10, 20)
+
+    for idx in range(spec.events):
+        if idx == opsync_at:
+            add(
+                event_line(
+                    "Comment", time_cs, time_cs + 5, "Default", "opsync", "opsync"
+                )
+            )
+            add(
+                event_line(
+                    "Comment", time_cs, time_cs + 3, "Default", "{Abertura}", "chptr"
+                )
+            )
+            time_cs += 9000
+        if idx == edsync_at:
+            add(
+                event_line(
+                    "Comment", time_cs, time_cs + 5, "Default", "edsync", "edsync"
+                )
+            )
+            time_cs += 9000
+
+        duration = rng.randint(120, 450)
+        name = ""
+        if previous and rng.random() < spec.cr_density:
+            folder, folder_texts = rng.choice(previous)
+            candidates = [n for n, text in enumerate(folder_texts, 1) if text]
+            target = rng.choice(candidates)
+            text = folder_texts[target - 1]
+            if rng.random() < 0.3:
+                text = mutate(text, rng)
+            name = f"CR-{folder}-[{target}]"
+        else:
+            text = random_sentence(rng)
+
+        style = rng.choice(("Default", "Default", "Default", "Default - Italics"))
+        add(
+            event_line("Dialogue", time_cs, time_cs + duration, style, text, name), text
+        )
+        time_cs += duration + rng.randint(0, 200)
+
+    lines = [SCRIPT_INFO]
+    lines.append(style_line("Default", "Arial", 60))
+    lines.append(style_line("Default - Italics", "Arial", 60, italic=True))
+    lines.append(EVENTS_HEADER)
+    lines.extend(events)
+    return lines, texts
+
+
+def drawing(rng, points):
+    coords = " ".join(
+        f"{rng.uniform(0, 400):.3f} {rng.uniform(0, 200):.3f}" for _ in range(points)
+    )
+    return f"m 0 0 l {coords}"
+
+
+def typeset_tags(rng, complexity):
+    tags = [
+        f"\\an{rng.randint(1, 9)}\\pos({rng.uniform(0, 1920):.3f},{rng.uniform(0, 1080):.3f})"
+    ]
+    for _ in range(complexity):
+        tags.append(
+            rng.choice(
+                (
+                    f"\\frz{rng.uniform(-30, 30):.3f}",
+                    f"\\fscx{rng.uniform(80, 140):.2f}\\fscy{rng.uniform(80, 140):.2f}",
+                    f"\\blur{rng.uniform(0.3, 3):.2f}",
+                    f"\\c&H{rng.randrange(0x1000000):06X}&",
+                    f"\\fn{rng.choice(FONTS)}",
+                    f"\\t({rng.randint(0, 500)},{rng.randint(500, 1500)},\\alpha&HFF&)",
+                    f"\\clip(m {rng.randint(0, 960)} 0 l 1920 0 1920 1080 0 1080)",
+                )
+            )
+        )
+    return "{" + "".join(tags) + "}"
+
+
+def generate_types(rng, spec):
+    lines = [SCRIPT_INFO]
+    lines.append(style_line("Signs", "Arial", 40, alignment=5))
+    lines.append(style_line("Episode Title", "URW Antiqua T", 50, alignment=5))
+    lines.append(EVENTS_HEADER)
+
+    time_cs = 500
+    for idx in range(spec.typeset_events):
+        duration = rng.randint(100, 600)
+        tags = typeset_tags(rng, spec.complexity)
+        # Signs are usually stacked on a few layers with a drawing behind
+        if rng.random() < 0.3:
+            text = tags.replace("}", "\\p1}") + drawing(rng, spec.complexity * 8)
+        else:
+            text = tags + random_sentence(rng)
+        style = "Episode Title" if idx == 0 else "Signs"
+        lines.append(
+            event_line(
+                "Dialogue",
+                time_cs,
+                time_cs + duration,
+                style,
+                text,
+                layer=rng.randint(0, 3),
+            )
+        )
+        if rng.random() < 0.5:
+            time_cs += rng.randint(50, 3000)
+    return lines
+
+
+def generate_song(rng, sync_name, count=30):
+    lines = [SCRIPT_INFO]
+    lines.append(style_line("RO", "Arial", 40, alignment=8))
+    lines.append(style_line("TR", "Arial", 44, alignment=8))
+    lines.append(EVENTS_HEADER)
+    lines.append(event_line("Comment", 1000, 1005, "RO", "sync", sync_name, "sync"))
+
+    time_cs = 1000
+    for _ in range(count):
+        duration = rng.randint(200, 500)
+        syllables = "".join(
+            f"{{\\k{rng.randint(10, 60)}}}{rng.choice(WORDS)} "
+            for _ in range(rng.randint(3, 8))
+        )
+        lines.append(
+            event_line("Dialogue", time_cs, time_cs + duration, "RO", syllables)
+        )
+        lines.append(
+            event_line(
+                "Dialogue", time_cs, time_cs + duration, "TR", random_sentence(rng)
+            )
+        )
+        time_cs += duration
+    return lines
+
+
+def write_lines(path, lines):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8-sig") as f:
+        f.writelines(lines)
+
+
+def generate_season(root, spec):
+    """
+    Writes a synthetic project with spec.episodes episodes to root.
+    """
+    root = Path(root)
+    rng = random.Random(spec.seed)
+
+    with open(root / "config.toml", "w", encoding="utf-8") as f:
+        f.write(CONFIG_TEMPLATE.format(episodes=spec.episodes))
+
+    songs = root / "common" / "songs"
+    write_lines(songs / "opening_01.ass", generate_song(rng, "opsync"))
+    write_lines(songs / "ending_01.ass", generate_song(rng, "edsync"))
+    (root / "common" / "fonts").mkdir(parents=True, exist_ok=True)
+    with open(root / "common" / "terms.txt", "w", encoding="utf-8") as f:
+        f.writelines(f"{term}\n" for term in TERMS)
+
+    previous = []
+    for ep in range(1, spec.episodes + 1):
+        folder = root / "episodes" / f"{ep:02d}"
+        lines, texts = generate_dialogs(rng, spec, previous)
+        write_lines(folder / "dialogs.ass", lines)
+        write_lines(folder / "types.ass", generate_types(rng, spec))
+        previous.append((f"{ep:02d}", texts))
+
+
+class Scenario:
+    def __init__(self, name, func, description):
+        self.name = name
+        self.func = func
+        self.description = description
+
+
+def scenario(name, description):
+    def register(func):
+        SCENARIOS[name] = Scenario(name, func, description)
+        return func
+
+    return register
+
+
+def season_files(project, episodes):
+    for ep in episodes:
+        yield from sorted((project / "episodes" / f"{ep:02d}").glob("*.ass"))
+
+
+@scenario("parse", "load_events and parse_document on every episode file")
+def bench_parse(project, episodes):
+    count = 0
+    for path in season_files(project, episodes):
+        count += len(load_events(path))
+        parse_document(read_ass_file(path))
+    return count
+
+
+@scenario("cross-reference", "Full cross-reference report without the index")
+def bench_cross_reference(project, episodes):
+    cross_reference = importlib.import_module("cross-reference")
+    results = cross_reference.process_files(
+        project / "episodes", episodes, 95.0, cross_reference.EventCache()
+    )
+    return len(results)
+
+
+@scenario("lint", "Every ass_lint rule except missing-font")
+def bench_lint(project, episodes):
+    import ass_lint
+    from ass_terms import TermChecker, load_terms
+
+    context = {
+        "max_cps": ass_lint.DEFAULT_MAX_CPS,
+        "fonts": None,
+        "resolution": ass_lint.load_resolution(project / "config.toml"),
+        "terms": TermChecker(load_terms(project / "common" / "terms.txt")),
+    }
+    rule_names = [name for name in ass_lint.RULES if name != "missing-font"]
+    count = 0
+    for issues, _, _ in ass_lint.iter_lint_results(
+        project / "episodes", episodes, rule_names, context
+    ):
+        count += len(issues)
+    return count
+
+
+def load_mux(project):
+    """
+    Imports mux.py and loads project into it, unless it is the project
+    already loaded.
+    """
+    import mux
+    from muxtools.utils.log import setup_logging
+
+    if mux.PROJECT_DIR != project.resolve():
+        mux.load_project(project)
+        # muxtools turns on debug output on its first log call unless a
+        # handler is already set up
+        setup_logging()
+        mux.logger.setLevel(logging.ERROR)
+    return mux
+
+
+@scenario("subtitles", "mux.py subtitle assembly: extras merge, credits and headers")
+def bench_subtitles(project, episodes):
+    mux = load_mux(project)
+    # Every run starts cold like a mux run does, so repeats do not only
+    # measure the extras parsed by the warm-up
+    mux.EXTRAS_CACHE = mux.ExtrasCache()
+
+    count = 0
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as work_dir:
+        work_dir = Path(work_dir)
+        for ep in episodes:
+            plan = mux.plan_episode(ep)
+            mux.Setup(
+                f"{ep:02d}",
+                config_file="",
+                show_name=mux.CONFIG["show_name"],
+                out_dir=str(work_dir),
+                clean_work_dirs=False,
+                work_dir=str(work_dir / f"{ep:02d}"),
+            )
+            subtitle = mux.CachedExtrasSubFile(plan.subtitles)
+            mux.assemble_subtitles(subtitle, plan)
+            count += len(plan.merges)
+    return count
+
+
+def time_scenario(bench, project, episodes, repeat):
+    """
+    Runs a scenario once to warm up imports and caches on disk, then
+    repeat more times. Returns the result dict written to the JSON.
+    """
+    items = bench.func(project, episodes)
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        bench.func(project, episodes)
+        runs.append(time.perf_counter() - start)
+
+    return {
+        "items": items,
+        "runs": runs,
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "mean": statistics.fmean(runs),
+    }
+
+
+def run_benchmarks(project, episodes, names, repeat):
+    results = {}
+    for name in names:
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = time_scenario(SCENARIOS[name], project, episodes, repeat)
+    return results
+
+
+def compare_results(current, baseline, threshold):
+    """
+    Prints the median of every scenario next to the baseline.
+    Returns the names of the scenarios that got slower by more than
+    threshold percent.
+    """
+    regressions = []
+    print(f"\n{'Scenario':<18}{'Baseline':>12}{'Current':>12}{'Change':>10}")
+    for name, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            print(f"{name:<18}{'-':>12}{result['median'] * 1000:>10.1f}ms{'new':>10}")
+            continue
+
+        change = (result["median"] - base["median"]) / base["median"] * 100
+        mark = ""
+        if change > threshold:
+            mark = " ✗"
+            regressions.append(name)
+        print(
+            f"{name:<18}{base['median'] * 1000:>10.1f}ms"
+            f"{result['median'] * 1000:>10.1f}ms{change:>+9.1f}%{mark}"
+        )
+
+    if baseline.get("season") != current["season"]:
+        print("\nWarning: the baseline was run on a different season")
+    return regressions
+
+
+def print_results(results):
+    print(f"\n{'Scenario':<18}{'Items':>8}{'Min':>12}{'Median':>12}")
+    for name, result in results.items():
+        print(
+            f"{name:<18}{result['items']:>8}"
+            f"{result['min'] * 1000:>10.1f}ms{result['median'] * 1000:>10.1f}ms"
+        )
+
+
+def add_season_arguments(parser):
+    parser.add_argument(
+        "--episodes",
+        type=int,
+        default=DEFAULT_EPISODES,
+        help=f"Episodes in the season (default: {DEFAULT_EPISODES})",
+    )
+    parser.add_argument(
+        "--events",
+        type=int,
+        default=DEFAULT_EVENTS,
+        help=f"Dialogue lines per episode (default: {DEFAULT_EVENTS})",
+    )
+    parser.add_argument(
+        "--cr-density",
+        type=float,
+        default=DEFAULT_CR_DENSITY,
+        help=f"Share of dialogue lines with a CR tag (default: {DEFAULT_CR_DENSITY})",
+    )
+    parser.add_argument(
+        "--typeset-events",
+        type=int,
+        default=DEFAULT_TYPESET_EVENTS,
+        help=f"Lines per types.ass (default: {DEFAULT_TYPESET_EVENTS})",
+    )
+    parser.add_argument(
+        "--complexity",
+        type=int,
+        default=DEFAULT_COMPLEXITY,
+        help=f"Override tags per sign, drawings get 8x as many points (default: {DEFAULT_COMPLEXITY})",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+
+
+def season_spec(args):
+    return SeasonSpec(
+        args.episodes,
+        args.events,
+        args.cr_density,
+        args.typeset_events,
+        args.complexity,
+        args.seed,
+    )
+
+
+def generate_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="benchmark.py generate",
+        description="Write a synthetic season to a folder",
+    )
+    parser.add_argument("path", help="Folder to write the project to")
+    add_season_arguments(parser)
+    args = parser.parse_args(argv)
+
+    root = Path(args.path)
+    root.mkdir(parents=True, exist_ok=True)
+    generate_season(root, season_spec(args))
+    print(f"Generated {args.episodes} episodes in {root}")
+
+
+SUBCOMMANDS = {
+    "generate": generate_main,
+}
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(
+        description="Time the subtitle tooling on a synthetic season",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python benchmark.py --output baseline.json
+  python benchmark.py --baseline baseline.json
+  python benchmark.py --scenarios parse,cross-reference --episodes 50
+  python benchmark.py --baseline baseline.json --fail-on-regression
+  python benchmark.py generate /tmp/season --episodes 37
+
+Scenarios:
+"""
+        + "\n".join(
+            f"  {name:<18}- {SCENARIOS[name].description}" for name in SCENARIOS
+        )
+        + """
+
+The season is generated in a temporary folder unless --project is
+given. A baseline is only comparable when it was run on the same
+season options.
+
+Exit Codes:
+  0 - Success (no regressions or --fail-on-regression not set)
+  1 - Failure (a scenario regressed when --fail-on-regression is set)
+        """,
+    )
+    parser.add_argument(
+        "--project", help="Use an existing project instead of generating one"
+    )
+    add_season_arguments(parser)
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help="Comma separated scenarios to run (default: all)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help=f"Timed runs per scenario after a warm-up run (default: {DEFAULT_REPEAT})",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a saved results file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        metavar="PERCENT",
+        help=f"Slowdown of the median counted as a regression (default: {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="Exit with code 1 if a scenario regressed against the baseline",
+    )
+
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"Error: Unknown scenario(s): {', '.join(unknown)}")
+        sys.exit(1)
+
+    if args.repeat < 1:
+        print("Error: Repeat must be at least 1")
+        sys.exit(1)
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error: Could not read baseline '{args.baseline}': {e}")
+            sys.exit(1)
+
+    spec = season_spec(args)
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as tmp_dir:
+        if args.project:
+            project = Path(args.project).resolve()
+            season = {"project": str(project)}
+        else:
+            project = Path(tmp_dir)
+            generate_season(project, spec)
+            season = spec.to_dict()
+
+        episodes = sorted(
+            int(folder.name)
+            for folder in (project / "episodes").iterdir()
+            if folder.name.isdigit()
+        )
+        results = run_benchmarks(project, episodes, names, args.repeat)
+
+    current = {
+        "version": RESULTS_VERSION,
+        "season": season,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scenarios": results,
+    }
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    regressions = []
+    if baseline:
+        regressions = compare_results(current, baseline, args.threshold)
+
+    if args.fail_on_regression and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,30 @@
 import os
-import re
 import sys
+import json
+import time
+import hashlib
 import argparse
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape, quoteattr
 from difflib import ndiff, SequenceMatcher
 
+from ass_events import (
+    CROSS_REFERENCE_PATTERN,
+    event_line_positions,
+    find_cross_reference,
+    load_events,
+    normalize_text,
+    read_ass_source,
+    write_ass_source,
+)
+
+try:
+    # Compiled drop-in for difflib, scores are identical
+    from cydifflib import SequenceMatcher as DEFAULT_MATCHER
+except ImportError:
+    DEFAULT_MATCHER = SequenceMatcher
+
 
 class Colors:
     RED = "\033[91m"
@@ -38,106 +58,266 @@ def parse_range(range_str):
         return [int(range_str)]
 
 
-def extract_text_from_line(line):
-    parts = line.split(",,")
-    if len(parts) >= 2:
-        return parts[-1].strip()
-    return None
+class SimilarityEngine:
+    """
+    Scores normalized texts with a SequenceMatcher compatible class.
+    Status decisions try the cheap upper bounds first and only run the
+    full ratio() when they cannot rule out a match on their own.
+    """
+
+    def __init__(self, fuzzy_threshold, matcher=None):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.matcher = matcher or DEFAULT_MATCHER
+
+    def similarity(self, normalized1, normalized2):
+        if normalized1 == normalized2:
+            return 100.0
+        return self.matcher(None, normalized1, normalized2).ratio() * 100
 
+    def status(self, normalized1, normalized2, similarity=None):
+        if normalized1 == normalized2:
+            return MatchStatus.EXACT, 100.0
 
-def normalize_text(text):
-    if not text:
-        return ""
-    text = re.sub(r"\\N", " ", text)
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+        if similarity is None:
+            matcher = self.matcher(None, normalized1, normalized2)
+            if matcher.real_quick_ratio() * 100 < self.fuzzy_threshold:
+                return MatchStatus.DIFFERENT, None
+            if matcher.quick_ratio() * 100 < self.fuzzy_threshold:
+                return MatchStatus.DIFFERENT, None
+            similarity = matcher.ratio() * 100
+
+        if similarity >= self.fuzzy_threshold:
+            return MatchStatus.SIMILAR, similarity
+        return MatchStatus.DIFFERENT, similarity
 
 
 def calculate_similarity(text1, text2):
     normalized1 = normalize_text(text1)
     normalized2 = normalize_text(text2)
-    return SequenceMatcher(None, normalized1, normalized2).ratio() * 100
+    return SimilarityEngine(0).similarity(normalized1, normalized2)
 
 
 def get_match_status(text1, text2, fuzzy_threshold):
     if not text1 or not text2:
         return MatchStatus.NOT_FOUND
 
-    if normalize_text(text1) == normalize_text(text2):
-        return MatchStatus.EXACT
-
-    similarity = calculate_similarity(text1, text2)
-    if similarity >= fuzzy_threshold:
-        return MatchStatus.SIMILAR
-    else:
-        return MatchStatus.DIFFERENT
+    engine = SimilarityEngine(fuzzy_threshold)
+    status, _ = engine.status(normalize_text(text1), normalize_text(text2))
+    return status
 
 
-def find_cross_reference_pattern(line):
-    match = re.search(r"CR-(\d+)-\[([0-9,\s]+)\]", line)
-    if match:
-        folder = match.group(1).zfill(2)
-        line_numbers = [int(x.strip()) for x in match.group(2).split(",")]
-        return folder, line_numbers
-    return None, None
+INDEX_FILE_NAME = ".crindex"
+INDEX_VERSION = 3
 
 
-def read_ass_file(file_path):
-    encodings = ["utf-8-sig", "utf-8", "latin-1", "cp1252"]
-    for encoding in encodings:
+def parse_event_file(file_path):
+    events = load_events(file_path)
+    texts = []
+    refs = []
+
+    for line_num, event in enumerate(events, 1):
+        # Lines with an Effect are sync markers (opsync, edsync...), not text
+        texts.append(event.text if event.text and not event.effect else None)
+        target_folder_num, target_line_numbers = find_cross_reference(event)
+        if target_folder_num and target_line_numbers:
+            refs.append([line_num, target_folder_num, target_line_numbers])
+
+    return {
+        "texts": texts,
+        "normalized": [normalize_text(text) for text in texts],
+        "refs": refs,
+    }
+
+
+def hash_file(file_path):
+    with open(file_path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def score_key(text1, text2):
+    return hashlib.sha1(f"{text1}\0{text2}".encode("utf-8")).hexdigest()
+
+
+class EventCache:
+    """
+    Cache of parsed [Events] sections.
+    Files are parsed lazily on first access and re-parsed only when
+    their content changes, so every lookup afterwards is a list index.
+    When an index path is given, parsed files and similarity scores are
+    persisted there and reused by the next run.
+    """
+
+    def __init__(self, index_path=None):
+        self.index_path = Path(index_path) if index_path else None
+        self._files = {}
+        self._scores = {}
+        self._used_scores = set()
+        self._folders = {}
+        self._changed = set()
+        self._dirty = False
+        self.reads = 0
+
+        if self.index_path:
+            self._load_index()
+
+    def _load_index(self):
         try:
-            with open(file_path, "r", encoding=encoding) as f:
-                return f.readlines()
-        except:
-            continue
-    return []
-
-
-def get_event_lines(file_path):
-    lines = read_ass_file(file_path)
-    event_lines = []
-    in_events = False
-    found_format = False
-
-    for line in lines:
-        if "[Events]" in line:
-            in_events = True
-            continue
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") != INDEX_VERSION:
+            return
+
+        self._files = data.get("files", {})
+        self._scores = data.get("scores", {})
+
+    def save(self):
+        if not self.index_path:
+            return
+        if not self._dirty and len(self._used_scores) == len(self._scores):
+            return
+
+        data = {
+            "version": INDEX_VERSION,
+            "files": self._files,
+            "scores": {k: self._scores[k] for k in self._used_scores},
+        }
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"Warning: could not write index '{self.index_path}': {e}")
+
+    def get(self, file_path):
+        path = Path(file_path)
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+
+        key = str(path.resolve())
+        entry = self._files.get(key)
+        if entry and (entry["mtime_ns"], entry["size"]) == (
+            stat.st_mtime_ns,
+            stat.st_size,
+        ):
+            return entry
+
+        digest = hash_file(path)
+        if entry and entry["sha1"] == digest:
+            entry["mtime_ns"] = stat.st_mtime_ns
+            self._changed.add(key)
+            self._dirty = True
+            return entry
+
+        entry = parse_event_file(path)
+        entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size, sha1=digest)
+        self.reads += 1
+        self._files[key] = entry
+        self._changed.add(key)
+        self._dirty = True
+        return entry
+
+    def get_score(self, normalized1, normalized2):
+        key = score_key(normalized1, normalized2)
+        score = self._scores.get(key)
+        if score is not None:
+            self._used_scores.add(key)
+        return score
+
+    def set_score(self, normalized1, normalized2, score):
+        key = score_key(normalized1, normalized2)
+        self._scores[key] = score
+        self._used_scores.add(key)
+        self._dirty = True
+
+    def match(self, engine, text1, text2):
+        """
+        Returns (status, similarity). Similarity is None when the
+        bounds alone proved the texts DIFFERENT; resolve_similarity
+        fills it in for the entries that are actually displayed.
+        """
+        normalized1 = normalize_text(text1)
+        normalized2 = normalize_text(text2)
+        cached = self.get_score(normalized1, normalized2)
+        status, similarity = engine.status(normalized1, normalized2, cached)
+        if cached is None and similarity is not None and status != MatchStatus.EXACT:
+            self.set_score(normalized1, normalized2, similarity)
+        return status, similarity
+
+    def resolve_similarities(self, engine, results):
+        for result in results:
+            self.resolve_similarity(engine, result)
+            yield result
+
+    def resolve_similarity(self, engine, result):
+        if result["similarity"] is not None or not result["target_text"]:
+            return
+        normalized1 = normalize_text(result["text"])
+        normalized2 = normalize_text(result["target_text"])
+        similarity = self.get_score(normalized1, normalized2)
+        if similarity is None:
+            similarity = engine.similarity(normalized1, normalized2)
+            self.set_score(normalized1, normalized2, similarity)
+        result["similarity"] = similarity
+
+    def export_changes(self):
+        return {
+            "files": {k: self._files[k] for k in self._changed},
+            "scores": {k: self._scores[k] for k in self._used_scores},
+            "reads": self.reads,
+        }
+
+    def merge_changes(self, changes):
+        for key, entry in changes["files"].items():
+            self._files[key] = entry
+            self._changed.add(key)
+        self._scores.update(changes["scores"])
+        self._used_scores.update(changes["scores"])
+        self.reads += changes["reads"]
+        if changes["files"] or changes["scores"]:
+            self._dirty = True
+
+    def forget_folder(self, folder):
+        self._folders.pop(str(folder), None)
+
+    def list_ass_files(self, folder):
+        key = str(folder)
+        if key not in self._folders:
+            if folder.is_dir():
+                self._folders[key] = list(folder.glob("*.ass"))
+            else:
+                self._folders[key] = []
+        return self._folders[key]
 
-        if in_events:
-            if line.startswith("Format:"):
-                found_format = True
-                continue
 
-            if found_format and (
-                line.startswith("Dialogue:") or line.startswith("Comment:")
-            ):
-                event_lines.append(line)
+EVENT_CACHE = EventCache()
 
-    return event_lines
 
+def get_text_from_lines(file_path, line_numbers, cache=EVENT_CACHE):
+    entry = cache.get(file_path)
+    if not entry:
+        return None
 
-def get_text_from_lines(file_path, line_numbers):
-    event_lines = get_event_lines(file_path)
+    event_texts = entry["texts"]
     texts = []
 
     for line_num in line_numbers:
-        if 1 <= line_num <= len(event_lines):
-            text = extract_text_from_line(event_lines[line_num - 1])
+        if 1 <= line_num <= len(event_texts):
+            text = event_texts[line_num - 1]
             if text:
                 texts.append(text)
 
     return " ".join(texts) if texts else None
 
 
-def find_text_in_folder(target_folder, line_numbers):
-    if not target_folder.exists() or not target_folder.is_dir():
-        return None, None, None
-
-    target_ass_files = list(target_folder.glob("*.ass"))
-
-    for target_ass in target_ass_files:
-        text = get_text_from_lines(target_ass, line_numbers)
+def find_text_in_folder(target_folder, line_numbers, cache=EVENT_CACHE):
+    for target_ass in cache.list_ass_files(target_folder):
+        text = get_text_from_lines(target_ass, line_numbers, cache)
         if text:
             return target_ass.name, text, line_numbers
 
@@ -168,84 +348,168 @@ def generate_colored_diff(text1, text2, use_colors=True):
     return "\n".join(result) if result else None
 
 
-def process_files(base_path, folder_range, fuzzy_threshold):
-    base_dir = Path(base_path)
-    if not base_dir.exists():
+def check_base_path(base_path):
+    if not Path(base_path).exists():
         print(f"Error: Path '{base_path}' does not exist")
         sys.exit(1)
 
+
+def check_reference(
+    base_dir,
+    folder_name,
+    file_name,
+    line_num,
+    text,
+    target_folder_num,
+    target_line_numbers,
+    engine,
+    cache=EVENT_CACHE,
+):
+    target_folder = base_dir / target_folder_num
+    target_file, target_text, target_lines = find_text_in_folder(
+        target_folder, target_line_numbers, cache
+    )
+
+    similarity = None
+    status = MatchStatus.NOT_FOUND
+
+    if target_file and target_text:
+        status, similarity = cache.match(engine, text, target_text)
+
+    return {
+        "folder": folder_name,
+        "file": file_name,
+        "line_num": line_num,
+        "cross_ref": f"CR-{target_folder_num}-{target_line_numbers}",
+        "target_folder": target_folder_num,
+        "target_line_numbers": target_line_numbers,
+        "text": text,
+        "target_file": target_file,
+        "target_text": target_text,
+        "similarity": similarity,
+        "status": status,
+    }
+
+
+def iter_file_results(base_dir, folder_name, ass_file, engine, cache=EVENT_CACHE):
+    entry = cache.get(ass_file)
+    if not entry:
+        return
+
+    for line_num, target_folder_num, target_line_numbers in entry["refs"]:
+        text = entry["texts"][line_num - 1]
+        if not text:
+            continue
+
+        yield check_reference(
+            base_dir,
+            folder_name,
+            ass_file.name,
+            line_num,
+            text,
+            target_folder_num,
+            target_line_numbers,
+            engine,
+            cache,
+        )
+
+
+def iter_results(base_path, folder_range, fuzzy_threshold, cache=EVENT_CACHE):
+    """
+    Yields one result per CR reference, in folder/file/line order,
+    as soon as it is scored.
+    """
+    base_dir = Path(base_path)
     folders_to_process = [str(f).zfill(2) for f in folder_range]
-    results = []
+    engine = SimilarityEngine(fuzzy_threshold)
 
     for folder_name in folders_to_process:
         folder = base_dir / folder_name
         if not folder.exists():
             continue
 
-        ass_files = list(folder.glob("*.ass"))
-
-        for ass_file in ass_files:
-            event_lines = get_event_lines(ass_file)
-
-            for line_num, line in enumerate(event_lines, 1):
-                target_folder_num, target_line_numbers = find_cross_reference_pattern(
-                    line
-                )
-
-                if not target_folder_num or not target_line_numbers:
-                    continue
+        for ass_file in cache.list_ass_files(folder):
+            yield from iter_file_results(base_dir, folder_name, ass_file, engine, cache)
+
+
+def process_files(base_path, folder_range, fuzzy_threshold, cache=EVENT_CACHE):
+    check_base_path(base_path)
+    return list(iter_results(base_path, folder_range, fuzzy_threshold, cache))
+
+
+def _process_folder_worker(base_path, folder_num, fuzzy_threshold, index_path):
+    cache = EventCache(index_path)
+    results = process_files(base_path, [folder_num], fuzzy_threshold, cache)
+    return results, cache.export_changes()
+
+
+def iter_results_parallel(
+    base_path, folder_range, fuzzy_threshold, jobs, cache=EVENT_CACHE
+):
+    """
+    Same as iter_results, but every folder is handled by a worker
+    process. Folders are yielded back in order, so the report matches
+    a serial run exactly.
+    """
+    count = len(folder_range)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        shards = executor.map(
+            _process_folder_worker,
+            [base_path] * count,
+            folder_range,
+            [fuzzy_threshold] * count,
+            [cache.index_path] * count,
+        )
+        for shard_results, changes in shards:
+            cache.merge_changes(changes)
+            yield from shard_results
 
-                text = extract_text_from_line(line)
-                if not text:
-                    continue
 
-                target_folder = base_dir / target_folder_num
-                target_file, target_text, target_lines = find_text_in_folder(
-                    target_folder, target_line_numbers
-                )
+FILTER_STATUSES = {
+    "matched": (MatchStatus.EXACT, MatchStatus.SIMILAR),
+    "exact": (MatchStatus.EXACT,),
+    "similar": (MatchStatus.SIMILAR,),
+    "different": (MatchStatus.DIFFERENT,),
+    "not-found": (MatchStatus.NOT_FOUND,),
+}
 
-                similarity = None
-                status = MatchStatus.NOT_FOUND
-
-                if target_file and target_text:
-                    similarity = calculate_similarity(text, target_text)
-                    status = get_match_status(text, target_text, fuzzy_threshold)
-
-                results.append(
-                    {
-                        "folder": folder_name,
-                        "file": ass_file.name,
-                        "line_num": line_num,
-                        "cross_ref": f"CR-{target_folder_num}-{target_line_numbers}",
-                        "target_folder": target_folder_num,
-                        "target_line_numbers": target_line_numbers,
-                        "text": text,
-                        "target_file": target_file,
-                        "target_text": target_text,
-                        "similarity": similarity,
-                        "status": status,
-                    }
-                )
 
-    return results
+def filter_results(results, filter_type):
+    statuses = FILTER_STATUSES.get(filter_type)
+    if statuses is None:
+        return results
+    return (r for r in results if r["status"] in statuses)
+
+
+class ResultTally:
+    """
+    Running per-status counts, updated as results stream through.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.displayed = 0
+        self.counts = dict.fromkeys(
+            (
+                MatchStatus.EXACT,
+                MatchStatus.SIMILAR,
+                MatchStatus.DIFFERENT,
+                MatchStatus.NOT_FOUND,
+            ),
+            0,
+        )
 
+    def track(self, results):
+        for result in results:
+            self.total += 1
+            self.counts[result["status"]] += 1
+            yield result
 
-def filter_results(results, filter_type):
-    if filter_type == "matched":
-        return [
-            r
-            for r in results
-            if r["status"] in [MatchStatus.EXACT, MatchStatus.SIMILAR]
-        ]
-    elif filter_type == "not-found":
-        return [r for r in results if r["status"] == MatchStatus.NOT_FOUND]
-    elif filter_type == "different":
-        return [r for r in results if r["status"] == MatchStatus.DIFFERENT]
-    elif filter_type == "similar":
-        return [r for r in results if r["status"] == MatchStatus.SIMILAR]
-    elif filter_type == "exact":
-        return [r for r in results if r["status"] == MatchStatus.EXACT]
-    return results
+    @property
+    def has_issues(self):
+        return bool(
+            self.counts[MatchStatus.DIFFERENT] or self.counts[MatchStatus.NOT_FOUND]
+        )
 
 
 def get_status_color(status):
@@ -278,11 +542,11 @@ def print_header_file():
     print()
 
 
-def print_result_terminal(idx, result, total):
+def print_result_terminal(idx, result):
     status_color = get_status_color(result["status"])
 
     print(
-        f"{Colors.BOLD}{Colors.WHITE}┌─ Entry {idx}/{total} {('─' * (88 - len(str(idx)) - len(str(total))))}┐{Colors.RESET}"
+        f"{Colors.BOLD}{Colors.WHITE}┌─ Entry {idx} {('─' * (89 - len(str(idx))))}┐{Colors.RESET}"
     )
     print(f"{Colors.BOLD}{Colors.WHITE}│{Colors.RESET}")
 
@@ -360,8 +624,8 @@ def print_result_terminal(idx, result, total):
     print()
 
 
-def print_result_file(idx, result, total):
-    print(f"[Entry {idx}/{total}]")
+def print_result_file(idx, result):
+    print(f"[Entry {idx}]")
     print()
 
     print(f"  Source:")
@@ -404,13 +668,13 @@ def print_result_file(idx, result, total):
     print()
 
 
-def print_summary_terminal(results, all_results, fuzzy_threshold):
-    total = len(all_results)
-    displayed = len(results)
-    exact = sum(1 for r in all_results if r["status"] == MatchStatus.EXACT)
-    similar = sum(1 for r in all_results if r["status"] == MatchStatus.SIMILAR)
-    different = sum(1 for r in all_results if r["status"] == MatchStatus.DIFFERENT)
-    not_found = sum(1 for r in all_results if r["status"] == MatchStatus.NOT_FOUND)
+def print_summary_terminal(tally, fuzzy_threshold):
+    total = tally.total
+    displayed = tally.displayed
+    exact = tally.counts[MatchStatus.EXACT]
+    similar = tally.counts[MatchStatus.SIMILAR]
+    different = tally.counts[MatchStatus.DIFFERENT]
+    not_found = tally.counts[MatchStatus.NOT_FOUND]
 
     print(f"{Colors.BOLD}{Colors.CYAN}╔{'═' * 98}╗{Colors.RESET}")
     print(f"{Colors.BOLD}{Colors.CYAN}║{' ' * 42}SUMMARY{' ' * 50}║{Colors.RESET}")
@@ -440,13 +704,13 @@ def print_summary_terminal(results, all_results, fuzzy_threshold):
     print()
 
 
-def print_summary_file(results, all_results, fuzzy_threshold):
-    total = len(all_results)
-    displayed = len(results)
-    exact = sum(1 for r in all_results if r["status"] == MatchStatus.EXACT)
-    similar = sum(1 for r in all_results if r["status"] == MatchStatus.SIMILAR)
-    different = sum(1 for r in all_results if r["status"] == MatchStatus.DIFFERENT)
-    not_found = sum(1 for r in all_results if r["status"] == MatchStatus.NOT_FOUND)
+def print_summary_file(tally, fuzzy_threshold):
+    total = tally.total
+    displayed = tally.displayed
+    exact = tally.counts[MatchStatus.EXACT]
+    similar = tally.counts[MatchStatus.SIMILAR]
+    different = tally.counts[MatchStatus.DIFFERENT]
+    not_found = tally.counts[MatchStatus.NOT_FOUND]
 
     print("=" * 100)
     print(" " * 42 + "SUMMARY")
@@ -462,7 +726,11 @@ def print_summary_file(results, all_results, fuzzy_threshold):
     print()
 
 
-def generate_report(results, all_results, fuzzy_threshold):
+def generate_report(results, tally, fuzzy_threshold):
+    """
+    Prints each result as soon as it arrives. The summary is printed
+    from the running tally once the stream is exhausted.
+    """
     redirected = is_redirected()
 
     if redirected:
@@ -470,20 +738,820 @@ def generate_report(results, all_results, fuzzy_threshold):
     else:
         print_header_terminal()
 
-    total = len(results)
     for idx, result in enumerate(results, 1):
+        tally.displayed = idx
         if redirected:
-            print_result_file(idx, result, total)
+            print_result_file(idx, result)
         else:
-            print_result_terminal(idx, result, total)
+            print_result_terminal(idx, result)
 
     if redirected:
-        print_summary_file(results, all_results, fuzzy_threshold)
+        print_summary_file(tally, fuzzy_threshold)
     else:
-        print_summary_terminal(results, all_results, fuzzy_threshold)
+        print_summary_terminal(tally, fuzzy_threshold)
+
+
+def result_key(result):
+    return result["folder"], result["file"], result["line_num"]
+
+
+class CrossReferenceWatcher:
+    """
+    Keeps every CR entry of the range in memory and re-checks only the
+    entries touched by a changed file: all entries whose source is that
+    file, and the entries whose target (folder, line) text changed,
+    found through a reverse index.
+    """
+
+    def __init__(self, base_path, folder_range, fuzzy_threshold, cache=EVENT_CACHE):
+        self.base_dir = Path(base_path)
+        self.folders = [str(f).zfill(2) for f in folder_range]
+        self.engine = SimilarityEngine(fuzzy_threshold)
+        self.cache = cache
+        self.entries = {}
+        self.sources = {}
+        self.targets = {}
+        self.texts = {}
+        self.mtimes = self.snapshot()
+
+        for path in self.mtimes:
+            self._remember_texts(path)
+
+        for folder_name in self.folders:
+            for ass_file in cache.list_ass_files(self.base_dir / folder_name):
+                self._add_file(folder_name, ass_file)
+
+    def snapshot(self):
+        mtimes = {}
+        for path in self.base_dir.glob("*/*.ass"):
+            try:
+                mtimes[path] = path.stat().st_mtime_ns
+            except OSError:
+                continue
+        return mtimes
+
+    def poll(self):
+        """
+        Returns the .ass files added, removed or modified since the
+        last poll.
+        """
+        mtimes = self.snapshot()
+        changed = {
+            path
+            for path in mtimes.keys() | self.mtimes.keys()
+            if mtimes.get(path) != self.mtimes.get(path)
+        }
+        self.mtimes = mtimes
+        return sorted(changed)
+
+    def _remember_texts(self, ass_file):
+        entry = self.cache.get(ass_file)
+        texts = entry["texts"] if entry else []
+        old_texts = self.texts.get(str(ass_file), [])
+        self.texts[str(ass_file)] = texts
+        return old_texts, texts
+
+    def _index(self, result):
+        key = result_key(result)
+        self.entries[key] = result
+        for line in result["target_line_numbers"]:
+            self.targets.setdefault((result["target_folder"], line), set()).add(key)
+        return key
+
+    def _unindex(self, key):
+        result = self.entries.pop(key)
+        for line in result["target_line_numbers"]:
+            self.targets.get((result["target_folder"], line), set()).discard(key)
+        return result
+
+    def _add_file(self, folder_name, ass_file):
+        keys = [
+            self._index(result)
+            for result in iter_file_results(
+                self.base_dir, folder_name, ass_file, self.engine, self.cache
+            )
+        ]
+        self.sources[str(ass_file)] = keys
+        return keys
+
+    def refresh(self, changed_paths):
+        """
+        Re-checks the entries affected by changed_paths and returns
+        (key, old_result, new_result) for every entry that changed.
+        """
+        old_results = {}
+        new_keys = set()
+        affected = set()
+
+        for path in changed_paths:
+            self.cache.forget_folder(path.parent)
+            folder_name = path.parent.name
+            old_texts, texts = self._remember_texts(path)
+
+            for line in range(1, max(len(old_texts), len(texts)) + 1):
+                if old_texts[line - 1 : line] != texts[line - 1 : line]:
+                    affected |= self.targets.get((folder_name, line), set())
+
+            for key in self.sources.pop(str(path), []):
+                old_results[key] = self._unindex(key)
+
+            if folder_name in self.folders and path.exists():
+                new_keys.update(self._add_file(folder_name, path))
+
+        for key in affected - new_keys:
+            if key not in self.entries:
+                continue
+            old_results[key] = self._unindex(key)
+            result = self._recheck(old_results[key])
+            self._index(result)
+            new_keys.add(key)
+
+        deltas = []
+        for key in sorted(old_results.keys() | new_keys):
+            old = old_results.get(key)
+            new = self.entries.get(key)
+            if old and new and _same_outcome(old, new):
+                continue
+            deltas.append((key, old, new))
+        return deltas
+
+    def _recheck(self, result):
+        return check_reference(
+            self.base_dir,
+            result["folder"],
+            result["file"],
+            result["line_num"],
+            result["text"],
+            result["target_folder"],
+            result["target_line_numbers"],
+            self.engine,
+            self.cache,
+        )
+
+    def tally(self):
+        tally = ResultTally()
+        for _ in tally.track(self.entries.values()):
+            pass
+        return tally
+
+
+def _same_outcome(old, new):
+    return (
+        old["status"] == new["status"]
+        and old["text"] == new["text"]
+        and old["target_text"] == new["target_text"]
+        and old["cross_ref"] == new["cross_ref"]
+    )
+
+
+def print_watch_delta(key, old, new, engine, cache):
+    folder, file_name, line_num = key
+    location = f"{folder}/{file_name}:{line_num}"
+    use_colors = not is_redirected()
+
+    if new is None:
+        print(f"  {location} {old['cross_ref']}  removed")
+        return
+
+    cache.resolve_similarity(engine, new)
+    status = new["status"]
+    if new["similarity"] is not None and status != MatchStatus.EXACT:
+        status = f"{status} ({new['similarity']:.2f}%)"
+    if old is not None and old["status"] != new["status"]:
+        status = f"{old['status']} → {status}"
+    elif old is None:
+        status = f"added, {status}"
+
+    if use_colors:
+        color = get_status_color(new["status"])
+        status = f"{color}{status}{Colors.RESET}"
+    print(f"  {location} {new['cross_ref']}  {status}")
+
+
+def print_watch_tally(tally):
+    print(
+        f"  Total: {tally.total} | Exact: {tally.counts[MatchStatus.EXACT]} | "
+        f"Similar: {tally.counts[MatchStatus.SIMILAR]} | "
+        f"Different: {tally.counts[MatchStatus.DIFFERENT]} | "
+        f"Not Found: {tally.counts[MatchStatus.NOT_FOUND]}"
+    )
+
+
+def watch(base_path, folder_range, fuzzy_threshold, cache, interval):
+    watcher = CrossReferenceWatcher(base_path, folder_range, fuzzy_threshold, cache)
+    cache.save()
+
+    print(f"Watching {base_path} for changes (Ctrl+C to stop)")
+    print_watch_tally(watcher.tally())
+    sys.stdout.flush()
+
+    try:
+        while True:
+            time.sleep(interval)
+            changed = watcher.poll()
+            if not changed:
+                continue
+
+            names = ", ".join(f"{p.parent.name}/{p.name}" for p in changed)
+            print(f"{time.strftime('%H:%M:%S')} Changed: {names}")
+            deltas = watcher.refresh(changed)
+            if not deltas:
+                print("  No cross reference changes")
+            for key, old, new in deltas:
+                print_watch_delta(key, old, new, watcher.engine, cache)
+            print_watch_tally(watcher.tally())
+            sys.stdout.flush()
+            cache.save()
+    except KeyboardInterrupt:
+        print()
+
+
+STATUS_KEYS = {
+    MatchStatus.EXACT: "exact",
+    MatchStatus.SIMILAR: "similar",
+    MatchStatus.DIFFERENT: "different",
+    MatchStatus.NOT_FOUND: "not-found",
+}
+
+
+def result_to_dict(result):
+    similarity = result["similarity"]
+    return {
+        "status": STATUS_KEYS[result["status"]],
+        "similarity": round(similarity, 2) if similarity is not None else None,
+        "cross_ref": result["cross_ref"],
+        "source": {
+            "folder": result["folder"],
+            "file": result["file"],
+            "line": result["line_num"],
+            "text": result["text"],
+        },
+        "target": {
+            "folder": result["target_folder"],
+            "file": result["target_file"],
+            "lines": result["target_line_numbers"],
+            "text": result["target_text"],
+        },
+    }
+
+
+def summary_to_dict(tally, fuzzy_threshold):
+    return {
+        "threshold": fuzzy_threshold,
+        "total": tally.total,
+        "displayed": tally.displayed,
+        "exact": tally.counts[MatchStatus.EXACT],
+        "similar": tally.counts[MatchStatus.SIMILAR],
+        "different": tally.counts[MatchStatus.DIFFERENT],
+        "not_found": tally.counts[MatchStatus.NOT_FOUND],
+    }
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def write_report_ndjson(results, tally, fuzzy_threshold, out=None):
+    """
+    One JSON object per line: an "entry" object per result, flushed as
+    it is produced, followed by a single "summary" object.
+    """
+    out = out or sys.stdout
+    for idx, result in enumerate(results, 1):
+        tally.displayed = idx
+        data = result_to_dict(result)
+        data["type"] = "entry"
+        out.write(_dumps(data) + "\n")
+        out.flush()
+
+    data = summary_to_dict(tally, fuzzy_threshold)
+    data["type"] = "summary"
+    out.write(_dumps(data) + "\n")
+
+
+def write_report_json(results, tally, fuzzy_threshold, out=None):
+    """
+    A single {"entries": [...], "summary": {...}} document. Entries are
+    written as they arrive, so nothing is buffered.
+    """
+    out = out or sys.stdout
+    out.write('{"entries":[')
+    for idx, result in enumerate(results, 1):
+        tally.displayed = idx
+        if idx > 1:
+            out.write(",")
+        out.write(_dumps(result_to_dict(result)))
+    out.write('],"summary":')
+    out.write(_dumps(summary_to_dict(tally, fuzzy_threshold)))
+    out.write("}\n")
+
+
+def _junit_testcase(result):
+    name = quoteattr(f"{result['file']}:{result['line_num']} {result['cross_ref']}")
+    classname = quoteattr(f"{result['folder']}.{result['file']}")
+    status = result["status"]
+
+    if status == MatchStatus.NOT_FOUND:
+        message = quoteattr(f"{status} in folder {result['target_folder']}")
+        body = escape(result["text"])
+    elif status == MatchStatus.DIFFERENT:
+        message = quoteattr(f"{status} ({result['similarity']:.2f}%)")
+        body = escape(f"Source: {result['text']}\nTarget: {result['target_text']}")
+    else:
+        return f"    <testcase name={name} classname={classname}/>\n"
+
+    return (
+        f"    <testcase name={name} classname={classname}>"
+        f"<failure message={message}>{body}</failure></testcase>\n"
+    )
+
+
+def write_report_junit(results, tally, fuzzy_threshold, out=None):
+    """
+    One <testsuite> per source folder. Results arrive in folder order,
+    so only the current folder's test cases are held in memory.
+    """
+    out = out or sys.stdout
+
+    def flush_suite(folder, cases, failures):
+        out.write(
+            f'  <testsuite name="episode {folder}" tests="{len(cases)}" '
+            f'failures="{failures}">\n'
+        )
+        out.writelines(cases)
+        out.write("  </testsuite>\n")
+
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    out.write('<testsuites name="cross-reference">\n')
+
+    folder = None
+    cases = []
+    failures = 0
+    for idx, result in enumerate(results, 1):
+        tally.displayed = idx
+        if result["folder"] != folder:
+            if cases:
+                flush_suite(folder, cases, failures)
+            folder = result["folder"]
+            cases = []
+            failures = 0
+        cases.append(_junit_testcase(result))
+        if result["status"] in (MatchStatus.DIFFERENT, MatchStatus.NOT_FOUND):
+            failures += 1
+
+    if cases:
+        flush_suite(folder, cases, failures)
+    out.write("</testsuites>\n")
+
+
+REPORT_WRITERS = {
+    "text": generate_report,
+    "json": write_report_json,
+    "ndjson": write_report_ndjson,
+    "junit": write_report_junit,
+}
+
+
+SHIFT_WINDOW = 50
+
+
+def build_reverse_index(base_dir, cache=EVENT_CACHE):
+    """
+    Maps every referenced (target folder, event line) to the list of
+    (folder, file, line, target folder, target lines) references that
+    point at it, in one pass over the episode folders.
+    """
+    reverse = {}
+    folders = sorted(p for p in base_dir.iterdir() if p.is_dir())
+
+    for folder in folders:
+        for ass_file in cache.list_ass_files(folder):
+            entry = cache.get(ass_file)
+            if not entry:
+                continue
+
+            for line_num, target_folder_num, target_line_numbers in entry["refs"]:
+                if not entry["texts"][line_num - 1]:
+                    continue
+                ref = (
+                    folder.name,
+                    ass_file.name,
+                    line_num,
+                    target_folder_num,
+                    target_line_numbers,
+                )
+                for line in target_line_numbers:
+                    reverse.setdefault((target_folder_num, line), []).append(ref)
+
+    return reverse
+
+
+def find_shift(
+    base_dir, text, target_folder_num, line_numbers, source=None, cache=EVENT_CACHE
+):
+    """
+    Looks for the referenced text a few events above or below the
+    referenced lines, as happens when lines are inserted in the target.
+    source is the referencing (folder, file, line), which is never
+    accepted as its own target.
+    Returns (file name, offset) or (None, None).
+    """
+    normalized = normalize_text(text)
+
+    for ass_file in cache.list_ass_files(base_dir / target_folder_num):
+        entry = cache.get(ass_file)
+        if not entry:
+            continue
+
+        source_line = None
+        if source and source[:2] == (target_folder_num, ass_file.name):
+            source_line = source[2]
+
+        texts = entry["normalized"]
+        for offset in sorted(range(-SHIFT_WINDOW, SHIFT_WINDOW + 1), key=abs):
+            lines = [line + offset for line in line_numbers]
+            if offset == 0 or lines[0] < 1 or lines[-1] > len(texts):
+                continue
+            if source_line in lines:
+                continue
+            shifted = " ".join(texts[line - 1] for line in lines if texts[line - 1])
+            if shifted == normalized:
+                return ass_file.name, offset
+
+    return None, None
+
+
+def parse_impact_target(value):
+    """
+    Accepts "02" (every referenced line of episode 02) or
+    "02:191,200" (only those event lines).
+    """
+    folder, _, lines = value.partition(":")
+    folder = folder.zfill(2)
+    if not lines:
+        return folder, None
+    return folder, [int(x) for x in lines.split(",") if x.strip()]
+
+
+def impact_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="cross-reference.py impact",
+        description="List the cross references that depend on the given event lines",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python cross-reference.py impact episodes/ 02:191
+  python cross-reference.py impact episodes/ 02:191,200 05
+  python cross-reference.py impact episodes/ 02 --shifted
+
+Targets:
+  XX          - Every referenced event line of episode XX
+  XX:N,M,...  - Only event lines N, M, ... of episode XX
+
+References whose text is found a few lines away from the referenced
+position are reported as shifted, with the corrected CR tag.
+        """,
+    )
+    parser.add_argument(
+        "path", help="Path to the folder containing numbered episode folders"
+    )
+    parser.add_argument("targets", nargs="+", help='Targets (e.g., "02:191")')
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=95.0,
+        metavar="PERCENT",
+        help="Similarity threshold for fuzzy matching (default: 95.0)",
+    )
+    parser.add_argument(
+        "--shifted",
+        action="store_true",
+        help="Only list references that line insertions have shifted",
+    )
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Do not read or write the persistent event index",
+    )
+    args = parser.parse_args(argv)
+
+    check_base_path(args.path)
+    base_dir = Path(args.path)
+    cache = EventCache(None if args.no_index else base_dir / INDEX_FILE_NAME)
+    engine = SimilarityEngine(args.threshold)
+    reverse = build_reverse_index(base_dir, cache)
+    use_colors = not is_redirected()
+    shifted_count = 0
+
+    for target in args.targets:
+        folder, lines = parse_impact_target(target)
+        if lines is None:
+            lines = sorted(line for f, line in reverse if f == folder)
+
+        for line in lines:
+            refs = reverse.get((folder, line), [])
+            if args.shifted and not refs:
+                continue
+
+            output = []
+            for ref in refs:
+                ref_folder, ref_file, ref_line, target_folder_num, target_lines = ref
+                if target_lines[0] != line:
+                    # Multi-line references are reported under their first line
+                    if line in target_lines and target_lines[0] in lines:
+                        continue
+                entry = cache.get(base_dir / ref_folder / ref_file)
+                text = entry["texts"][ref_line - 1]
+                result = check_reference(
+                    base_dir,
+                    ref_folder,
+                    ref_file,
+                    ref_line,
+                    text,
+                    target_folder_num,
+                    target_lines,
+                    engine,
+                    cache,
+                )
+
+                status = result["status"]
+                note = ""
+                if status in (MatchStatus.DIFFERENT, MatchStatus.NOT_FOUND):
+                    shift_file, offset = find_shift(
+                        base_dir,
+                        text,
+                        target_folder_num,
+                        target_lines,
+                        (ref_folder, ref_file, ref_line),
+                        cache,
+                    )
+                    if offset:
+                        shifted_count += 1
+                        fixed = ", ".join(str(n + offset) for n in target_lines)
+                        note = (
+                            f"  shifted {offset:+d} in {shift_file}"
+                            f" → CR-{target_folder_num}-[{fixed}]"
+                        )
+                if args.shifted and not note:
+                    continue
+
+                if use_colors:
+                    status = (
+                        f"{get_status_color(result['status'])}{status}{Colors.RESET}"
+                    )
+                    note = f"{Colors.MAGENTA}{note}{Colors.RESET}" if note else ""
+                output.append(
+                    f"  {ref_folder}/{ref_file}:{ref_line}  {result['cross_ref']}"
+                    f"  {status}{note}"
+                )
+
+            if args.shifted and not output:
+                continue
+            print(f"{folder}:{line} ← {len(output)} reference(s)")
+            for entry_line in output:
+                print(entry_line)
+
+    cache.save()
+    if shifted_count:
+        print(f"\n{shifted_count} shifted reference(s) found")
+
+
+NGRAM_SIZE = 3
+RESOLVE_CANDIDATES = 5
+
+
+def text_ngrams(normalized):
+    text = f" {normalized.lower()} "
+    return {text[i : i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class NgramIndex:
+    """
+    Trigram index over the normalized event texts of one file.
+    Candidate lines are ranked by shared trigrams, so only a handful
+    of them ever reach SequenceMatcher.
+    """
+
+    def __init__(self, normalized_texts):
+        self.grams = []
+        self.postings = {}
+        for line_num, normalized in enumerate(normalized_texts, 1):
+            grams = text_ngrams(normalized) if normalized else set()
+            self.grams.append(grams)
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(line_num)
+
+    def candidates(self, normalized, near, limit=RESOLVE_CANDIDATES):
+        grams = text_ngrams(normalized)
+        shared = {}
+        for gram in grams:
+            for line_num in self.postings.get(gram, ()):
+                shared[line_num] = shared.get(line_num, 0) + 1
+
+        def rank(line_num):
+            dice = 2 * shared[line_num] / (len(grams) + len(self.grams[line_num - 1]))
+            return -dice, abs(line_num - near)
+
+        return sorted(shared, key=rank)[:limit]
+
+
+class CrossReferenceResolver:
+    """
+    Finds where a stale CR reference's text moved to in its target
+    episode. Multi-line references are resolved by a uniform offset,
+    single lines through the per-file n-gram index.
+    """
+
+    def __init__(self, base_dir, engine, cache=EVENT_CACHE):
+        self.base_dir = base_dir
+        self.engine = engine
+        self.cache = cache
+        self._indexes = {}
+
+    def _ngram_index(self, ass_file, entry):
+        key = (str(ass_file), entry["sha1"])
+        if key not in self._indexes:
+            self._indexes[key] = NgramIndex(entry["normalized"])
+        return self._indexes[key]
+
+    def _resolves_to(self, target_folder, line_numbers, file_name):
+        # The checker reads the first file of the folder that has text at
+        # these lines, so a match in a later file would not be picked up
+        found_file, _, _ = find_text_in_folder(target_folder, line_numbers, self.cache)
+        return found_file == file_name
+
+    def resolve(self, result):
+        """
+        Returns (line_numbers, similarity) for the best match of a
+        DIFFERENT or NOT FOUND result, or None when nothing in the
+        target episode reaches the threshold.
+        """
+        target_lines = result["target_line_numbers"]
+        source = (result["folder"], result["file"], result["line_num"])
+
+        target_folder = self.base_dir / result["target_folder"]
+
+        if len(target_lines) > 1:
+            shift_file, offset = find_shift(
+                self.base_dir,
+                result["text"],
+                result["target_folder"],
+                target_lines,
+                source,
+                self.cache,
+            )
+            if offset:
+                lines = [line + offset for line in target_lines]
+                if self._resolves_to(target_folder, lines, shift_file):
+                    return lines, 100.0
+            return None
+
+        normalized = normalize_text(result["text"])
+        best = None
+
+        for ass_file in self.cache.list_ass_files(target_folder):
+            entry = self.cache.get(ass_file)
+            if not entry:
+                continue
+
+            index = self._ngram_index(ass_file, entry)
+            for line_num in index.candidates(normalized, target_lines[0]):
+                if source == (result["target_folder"], ass_file.name, line_num):
+                    continue
+                if entry["texts"][line_num - 1] is None:
+                    continue
+                similarity = self.engine.similarity(
+                    normalized, entry["normalized"][line_num - 1]
+                )
+                if similarity < self.engine.fuzzy_threshold:
+                    continue
+                if not self._resolves_to(target_folder, [line_num], ass_file.name):
+                    continue
+                rank = (-similarity, abs(line_num - target_lines[0]))
+                if best is None or rank < best[0]:
+                    best = (rank, [line_num], similarity)
+
+        if best is None:
+            return None
+        return best[1], best[2]
+
+
+def format_cross_reference(folder, line_numbers):
+    return f"CR-{folder}-[{', '.join(str(n) for n in line_numbers)}]"
+
+
+def rewrite_cross_references(file_path, replacements):
+    """
+    Replaces the CR tag of the given event lines, keeping the file's
+    encoding and line endings. replacements maps event line to tag.
+    """
+    lines, encoding = read_ass_source(file_path)
+    positions = event_line_positions(lines)
+
+    for line_num, tag in replacements.items():
+        idx = positions[line_num - 1]
+        lines[idx] = CROSS_REFERENCE_PATTERN.sub(tag, lines[idx], count=1)
+
+    write_ass_source(file_path, lines, encoding)
+
+
+def resolve_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="cross-reference.py resolve",
+        description="Find where stale cross references moved and rewrite their tags",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python cross-reference.py resolve episodes/ 1-37
+  python cross-reference.py resolve episodes/ 11 --threshold 90 --write
+
+Every DIFFERENT or NOT FOUND reference is matched against the events of
+its target episode. The closest line whose similarity reaches the
+threshold is proposed as the new CR tag; --write applies the proposals.
+        """,
+    )
+    parser.add_argument(
+        "path", help="Path to the folder containing numbered episode folders"
+    )
+    parser.add_argument("range", help='Folder range to resolve (e.g., "1" or "1-5")')
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=95.0,
+        metavar="PERCENT",
+        help="Minimum similarity of the new target line (default: 95.0)",
+    )
+    parser.add_argument(
+        "--write",
+        action="store_true",
+        help="Rewrite the stale CR tags in the source files",
+    )
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Do not read or write the persistent event index",
+    )
+    args = parser.parse_args(argv)
+
+    check_base_path(args.path)
+    base_dir = Path(args.path)
+    cache = EventCache(None if args.no_index else base_dir / INDEX_FILE_NAME)
+    engine = SimilarityEngine(args.threshold)
+    resolver = CrossReferenceResolver(base_dir, engine, cache)
+    use_colors = not is_redirected()
+
+    rewrites = {}
+    unresolved = 0
+    for result in iter_results(
+        args.path, parse_range(args.range), args.threshold, cache
+    ):
+        if result["status"] not in (MatchStatus.DIFFERENT, MatchStatus.NOT_FOUND):
+            continue
+
+        location = f"{result['folder']}/{result['file']}:{result['line_num']}"
+        resolved = resolver.resolve(result)
+        if resolved is None:
+            unresolved += 1
+            message = f"  {location}  {result['cross_ref']}  no match found"
+            if use_colors:
+                message = f"{Colors.RED}{message}{Colors.RESET}"
+            print(message)
+            continue
+
+        line_numbers, similarity = resolved
+        tag = format_cross_reference(result["target_folder"], line_numbers)
+        path = base_dir / result["folder"] / result["file"]
+        rewrites.setdefault(path, {})[result["line_num"]] = tag
+        message = f"  {location}  {result['cross_ref']} → {tag} ({similarity:.2f}%)"
+        if use_colors:
+            message = f"{Colors.GREEN}{message}{Colors.RESET}"
+        print(message)
+
+    resolved_count = sum(len(r) for r in rewrites.values())
+    print()
+    print(f"Resolved: {resolved_count} | Unresolved: {unresolved}")
+
+    if args.write:
+        for path, replacements in rewrites.items():
+            rewrite_cross_references(path, replacements)
+        print(f"Rewrote {resolved_count} tag(s) in {len(rewrites)} file(s)")
+
+    cache.save()
+
+
+SUBCOMMANDS = {
+    "impact": impact_main,
+    "resolve": resolve_main,
+}
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         description="Cross-reference report for .ass files with CR-XXXX-[YYY,...] patterns",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -499,6 +1567,13 @@ Examples:
   python report.py episodes/ 1-10 --filter not-found
   python report.py episodes/ 1-10 --filter matched > matches.txt
   python report.py episodes/ 1-10 --fail-on-issues
+  python report.py episodes/ 1-10 --no-index
+  python report.py episodes/ 1-37 --jobs 4
+  python report.py episodes/ 1-37 --format ndjson | jq .
+  python report.py episodes/ 1-37 --format junit > cross-reference.xml
+  python report.py episodes/ 1-37 --watch
+  python report.py impact episodes/ 02:191
+  python report.py resolve episodes/ 1-37 --write
   
 Cross Reference Pattern:
   CR-XXXX-[YYY,...]
@@ -513,6 +1588,16 @@ Status Types:
   not-found  - NOT FOUND: Target lines not found in target folder
   matched    - Shows both exact and similar (all successful matches)
   
+Output Formats:
+  text    - Human readable report (default)
+  json    - {"entries": [...], "summary": {...}}
+  ndjson  - One "entry" object per line, then one "summary" object
+  junit   - One testsuite per episode, DIFFERENT/NOT FOUND as failures
+
+Event Index:
+  Parsed events and similarity scores are kept in <path>/.crindex
+  Files are only re-parsed when their content changes
+
 Exit Codes:
   0 - Success (no issues or --fail-on-issues not set)
   1 - Failure (found DIFFERENT or NOT FOUND entries when --fail-on-issues is set)
@@ -542,45 +1627,104 @@ Exit Codes:
         help="Filter results by status (default: all)",
     )
 
+    parser.add_argument(
+        "--format",
+        choices=list(REPORT_WRITERS),
+        default="text",
+        help="Report format (default: text)",
+    )
+
     parser.add_argument(
         "--fail-on-issues",
         action="store_true",
         help="Exit with code 1 if DIFFERENT or NOT FOUND entries exist",
     )
 
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of worker processes used to check folders (default: 1)",
+    )
+
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and re-check only references affected by saved files",
+    )
+
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        metavar="SECONDS",
+        help="Polling interval for --watch (default: 1.0)",
+    )
+
+    parser.add_argument(
+        "--index",
+        metavar="FILE",
+        help=f"Path of the persistent event index (default: <path>/{INDEX_FILE_NAME})",
+    )
+
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Do not read or write the persistent event index",
+    )
+
     args = parser.parse_args()
 
     if not 0 <= args.threshold <= 100:
         print("Error: Threshold must be between 0 and 100")
         sys.exit(1)
 
+    if args.jobs < 1:
+        print("Error: Jobs must be at least 1")
+        sys.exit(1)
+
+    index_path = None
+    if not args.no_index:
+        index_path = args.index or Path(args.path) / INDEX_FILE_NAME
+    cache = EventCache(index_path)
+
+    check_base_path(args.path)
     folder_range = parse_range(args.range)
-    all_results = process_files(args.path, folder_range, args.threshold)
 
-    if args.filter == "all":
-        filtered_results = all_results
+    if args.watch:
+        watch(args.path, folder_range, args.threshold, cache, args.interval)
+        return
+
+    if args.jobs > 1 and len(folder_range) > 1:
+        results = iter_results_parallel(
+            args.path, folder_range, args.threshold, args.jobs, cache
+        )
     else:
-        filtered_results = filter_results(all_results, args.filter)
+        results = iter_results(args.path, folder_range, args.threshold, cache)
 
-    generate_report(filtered_results, all_results, args.threshold)
+    tally = ResultTally()
+    results = filter_results(tally.track(results), args.filter)
+    results = cache.resolve_similarities(SimilarityEngine(args.threshold), results)
+
+    REPORT_WRITERS[args.format](results, tally, args.threshold)
+    cache.save()
+    print(f"Files read: {cache.reads}", file=sys.stderr)
 
     if args.fail_on_issues:
-        different_count = sum(
-            1 for r in all_results if r["status"] == MatchStatus.DIFFERENT
-        )
-        not_found_count = sum(
-            1 for r in all_results if r["status"] == MatchStatus.NOT_FOUND
-        )
+        different_count = tally.counts[MatchStatus.DIFFERENT]
+        not_found_count = tally.counts[MatchStatus.NOT_FOUND]
 
-        if different_count > 0 or not_found_count > 0:
-            if not is_redirected():
+        if tally.has_issues:
+            if args.format == "text" and not is_redirected():
                 print(f"{Colors.RED}{Colors.BOLD}✗ Validation failed:{Colors.RESET}")
                 print(f"  {Colors.YELLOW}Different:{Colors.RESET} {different_count}")
                 print(f"  {Colors.RED}Not Found:{Colors.RESET} {not_found_count}")
                 print()
             sys.exit(1)
         else:
-            if not is_redirected():
+            if args.format == "text" and not is_redirected():
                 print(
                     f"{Colors.GREEN}{Colors.BOLD}✓ Validation passed: All entries matched successfully{Colors.RESET}"
                 )
@@ -0,0 +1,759 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import sys
+import time
+import shutil
+import tomllib
+import argparse
+import subprocess
+from bisect import bisect_left
+from fractions import Fraction
+from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+ENCODE_DIR_NAME = "_encode"
+PROGRESS_INTERVAL = 10.0
+
+# x264 with -preset slow stops scaling well past a handful of threads,
+# so several episodes at once use a many-core box better than one
+THREADS_PER_JOB = 4
+
+# Chunked mode: segments are cut at the raw's keyframes, with a few
+# segments per worker so the last ones do not leave cores idle
+THREADS_PER_SEGMENT = 2
+SEGMENTS_PER_WORKER = 3
+MIN_SEGMENT_FRAMES = 720
+
+ENCODE_DEFAULTS = {
+    "raws_path": "./raws",
+    "raw_name": "{episode:02d}.mkv",
+    "output_path": None,
+    "crf": 21,
+    "preset": "slow",
+    "audio_quality": 91,
+    "memory_per_job_mb": 2048,
+}
+
+TOOLS = ("vspipe", "ffmpeg", "qaac64", "mkvmerge")
+
+VPY_TEMPLATE = """# Generated by encode.py from config.toml, changes are overwritten
+import vapoursynth as vs
+
+core = vs.core
+
+file = {source!r}
+
+# Load Video and Audio
+src_v = core.bs.VideoSource(file)
+src_a = core.bs.AudioSource(file)
+
+# Resize
+src_v = core.resize.Spline36(clip=src_v, width={width}, height={height})
+
+# Deband
+src_v = core.neo_f3kdb.Deband(src_v)
+
+# Set Output
+src_v.set_output(0)
+src_a.set_output(1)
+"""
+
+FRAMES_PATTERN = re.compile(r"^Frames:\s*(\d+)", re.MULTILINE)
+FPS_PATTERN = re.compile(r"^FPS:\s*(\d+)/(\d+)", re.MULTILINE)
+
+
+class EncodeError(Exception):
+    pass
+
+
+def parse_range(range_str):
+    if "-" in range_str:
+        start, end = range_str.split("-")
+        return list(range(int(start), int(end) + 1))
+    else:
+        return [int(range_str)]
+
+
+def parse_episodes(value):
+    """
+    Same forms as mux.py: "1...4", 1 or [1, 2, 3].
+    """
+    if isinstance(value, list):
+        return [int(x) for x in value]
+    elif isinstance(value, int):
+        return [value]
+    elif isinstance(value, str) and "..." in value:
+        start, end = value.split("...")
+        return list(range(int(start), int(end) + 1))
+    else:
+        raise ValueError(f"Invalid episodes value: {value}")
+
+
+def load_config(project_dir: Path):
+    """
+    Reads config.toml and fills in the [encode] table. Paths are
+    resolved against the project folder; encoded episodes go to
+    episodes/NN, where mux.py picks them up, unless encode.output_path
+    is set.
+    """
+    with open(project_dir / "config.toml", "rb") as f:
+        data = tomllib.load(f)
+
+    encode = {**ENCODE_DEFAULTS, **data.get("encode", {})}
+    encode["raws_path"] = (project_dir / encode["raws_path"]).resolve()
+    if encode["output_path"]:
+        encode["output_path"] = (project_dir / encode["output_path"]).resolve()
+
+    data["encode"] = encode
+    data["episodes_path"] = (project_dir / data["episodes_path"]).resolve()
+    data["episodes"] = parse_episodes(data["episodes"])
+    return data
+
+
+def available_memory_mb():
+    """
+    Returns the memory available for new processes, or None when it
+    cannot be read on this platform.
+    """
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+
+    try:
+        pages = os.sysconf("SC_AVPHYS_PAGES")
+        page_size = os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):  # Windows
+        return None
+    return pages * page_size // (1024 * 1024)
+
+
+def default_jobs(memory_per_job_mb: int, threads_per_job: int = THREADS_PER_JOB):
+    jobs = max(1, (os.cpu_count() or 1) // threads_per_job)
+    memory = available_memory_mb()
+    if memory is not None:
+        jobs = min(jobs, max(1, memory // memory_per_job_mb))
+    return jobs
+
+
+class EpisodeJob:
+    """
+    Paths and progress of one episode. Progress fields are written by
+    the worker thread and only read by the main thread.
+    """
+
+    def __init__(self, episode: int, config):
+        encode = config["encode"]
+        name = f"{episode:02d}"
+
+        self.episode = episode
+        self.raw = encode["raws_path"] / encode["raw_name"].format(episode=episode)
+        output_dir = encode["output_path"] or config["episodes_path"] / name
+        self.output = output_dir / f"{name}.mkv"
+        self.work_dir = config["project_dir"] / ENCODE_DIR_NAME / name
+        self.script = self.work_dir / f"{name}.vpy"
+        self.video = self.work_dir / "video.mkv"
+        self.audio = self.work_dir / "audio.m4a"
+        self.log = self.work_dir / "encode.log"
+        # Log of the chunked segment that failed, if any
+        self.failed_log = None
+
+        self.frames = None
+        self.frame = 0
+        self.fps = 0.0
+        self.started = None
+        # Per segment frame and fps counters in chunked mode
+        self.segment_frames = []
+        self.segment_fps = []
+
+    def is_up_to_date(self):
+        return (
+            self.output.exists()
+            and self.raw.exists()
+            and self.output.stat().st_mtime >= self.raw.stat().st_mtime
+        )
+
+    def eta(self):
+        if not self.frames or not self.fps:
+            return None
+        return (self.frames - self.frame) / self.fps
+
+
+def write_script(job: EpisodeJob, config):
+    width, height = config["resolution"]
+    job.work_dir.mkdir(parents=True, exist_ok=True)
+    with open(job.script, "w", encoding="utf-8") as f:
+        f.write(VPY_TEMPLATE.format(source=str(job.raw), width=width, height=height))
+
+
+def video_command(config, threads: int, output: Path):
+    """
+    Every segment of a chunked encode goes through this same command,
+    so rate control is identical to a whole-episode encode.
+    """
+    encode = config["encode"]
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-nostats",
+        "-progress",
+        "pipe:1",
+        "-f",
+        "yuv4mpegpipe",
+        "-i",
+        "-",
+        "-c:v",
+        "libx264",
+        "-preset",
+        str(encode["preset"]),
+        "-crf",
+        str(encode["crf"]),
+        "-pix_fmt",
+        "yuv420p",
+        "-threads",
+        str(threads),
+        "-y",
+        str(output),
+    ]
+
+
+def audio_command(job: EpisodeJob, config):
+    return [
+        "qaac64",
+        "-V",
+        str(config["encode"]["audio_quality"]),
+        "--silent",
+        "-o",
+        str(job.audio),
+        "-",
+    ]
+
+
+def clip_info(script: Path):
+    """
+    Returns (frames, fps) of the script's video output; either is None
+    when vspipe does not report it.
+    """
+    process = subprocess.run(
+        ["vspipe", "--info", str(script)], capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        lines = process.stderr.strip().splitlines()
+        raise EncodeError(
+            f"vspipe --info failed with exit code {process.returncode}"
+            + (f": {lines[-1]}" if lines else "")
+        )
+    output = process.stdout
+    frames = FRAMES_PATTERN.search(output)
+    fps = FPS_PATTERN.search(output)
+    return (
+        int(frames.group(1)) if frames else None,
+        Fraction(int(fps.group(1)), int(fps.group(2))) if fps else None,
+    )
+
+
+def source_keyframes(raw: Path, fps):
+    """
+    Returns the frame numbers of the raw's keyframes, which the source
+    encoder placed at scene changes and on its keyint. Only keyframes
+    are decoded, so this takes seconds rather than a full pass. Returns
+    an empty list without ffprobe or a known frame rate.
+    """
+    if fps is None or shutil.which("ffprobe") is None:
+        return []
+
+    output = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-skip_frame",
+            "nokey",
+            "-show_entries",
+            "frame=best_effort_timestamp_time",
+            "-of",
+            "csv=p=0",
+            str(raw),
+        ],
+        capture_output=True,
+        text=True,
+    ).stdout
+
+    times = []
+    for line in output.splitlines():
+        try:
+            times.append(float(line.strip().rstrip(",")))
+        except ValueError:
+            continue
+    if not times:
+        return []
+
+    # Frame 0 of the source filter is the first frame of the stream
+    first = min(times)
+    return sorted({round((value - first) * fps) for value in times})
+
+
+def plan_segments(frames: int, keyframes, count: int):
+    """
+    Splits [0, frames) into about count (start, end) ranges, end
+    exclusive. Each cut is the keyframe closest to an even split, or
+    the even split itself when there are no keyframes; segments shorter
+    than MIN_SEGMENT_FRAMES are merged into their neighbour.
+    """
+    cuts = [0]
+    for idx in range(1, count):
+        target = frames * idx // count
+        cut = target
+        if keyframes:
+            pos = bisect_left(keyframes, target)
+            nearby = keyframes[max(0, pos - 1) : pos + 1]
+            cut = min(nearby, key=lambda frame: abs(frame - target))
+        if cut - cuts[-1] >= MIN_SEGMENT_FRAMES and frames - cut >= MIN_SEGMENT_FRAMES:
+            cuts.append(cut)
+    cuts.append(frames)
+    return list(zip(cuts, cuts[1:]))
+
+
+def run_pipeline(source_cmd, sink_cmd, log, on_output=None):
+    """
+    Pipes source_cmd into sink_cmd. stderr of both goes to log; the
+    sink's stdout is handed to on_output line by line when given.
+    """
+    source = subprocess.Popen(source_cmd, stdout=subprocess.PIPE, stderr=log)
+    sink = subprocess.Popen(
+        sink_cmd,
+        stdin=source.stdout,
+        stdout=subprocess.PIPE if on_output else log,
+        stderr=log,
+        text=True,
+    )
+    # Let the source get SIGPIPE if the sink dies
+    source.stdout.close()
+
+    if on_output:
+        for line in sink.stdout:
+            on_output(line)
+
+    sink.wait()
+    source.wait()
+    # The sink first: when it dies the source fails too, on SIGPIPE
+    for cmd, process in ((sink_cmd, sink), (source_cmd, source)):
+        if process.returncode:
+            raise EncodeError(f"{cmd[0]} exited with code {process.returncode}")
+
+
+def finish_segment(job: EpisodeJob, segment: int):
+    # A finished segment keeps its frames but no longer adds to the fps
+    job.segment_fps[segment] = 0.0
+    job.fps = sum(job.segment_fps)
+
+
+def track_progress(job: EpisodeJob, segment=None):
+    """
+    Returns an ffmpeg -progress line handler. With a segment index the
+    episode frames are the sum over its segments and the fps the sum
+    over the segments still running.
+    """
+
+    def on_output(line):
+        key, _, value = line.strip().partition("=")
+        if key == "progress" and value == "end" and segment is not None:
+            finish_segment(job, segment)
+            return
+        try:
+            if key == "frame":
+                value = int(value)
+            elif key == "fps":
+                value = float(value)
+            else:
+                return
+        except ValueError:
+            return
+
+        if segment is None:
+            if key == "frame":
+                job.frame = value
+            else:
+                job.fps = value
+        elif key == "frame":
+            job.segment_frames[segment] = value
+            job.frame = sum(job.segment_frames)
+        else:
+            job.segment_fps[segment] = value
+            job.fps = sum(job.segment_fps)
+
+    return on_output
+
+
+def vspipe_command(job: EpisodeJob, output: int, container: str, frames=None):
+    cmd = ["vspipe", "-c", container, "-o", str(output)]
+    if frames:
+        start, end = frames
+        # vspipe's end frame is inclusive
+        cmd += ["-s", str(start), "-e", str(end - 1)]
+    return cmd + [str(job.script), "-"]
+
+
+def encode_audio(job: EpisodeJob, config, log):
+    run_pipeline(vspipe_command(job, 1, "wav"), audio_command(job, config), log)
+
+
+def merge_output(job: EpisodeJob, log):
+    job.output.parent.mkdir(parents=True, exist_ok=True)
+    subprocess.run(
+        ["mkvmerge", "-q", "-o", str(job.output), str(job.video), str(job.audio)],
+        stdout=log,
+        stderr=log,
+        check=True,
+    )
+
+
+def encode_episode(job: EpisodeJob, config, threads: int):
+    write_script(job, config)
+    job.frames, _ = clip_info(job.script)
+
+    with open(job.log, "w") as log:
+        encode_audio(job, config, log)
+        run_pipeline(
+            vspipe_command(job, 0, "y4m"),
+            video_command(config, threads, job.video),
+            log,
+            track_progress(job),
+        )
+        merge_output(job, log)
+
+
+def encode_segment(job: EpisodeJob, config, threads: int, idx: int, frames, path):
+    """
+    Encodes one segment of a chunked episode, logging to a file of its
+    own next to the segment.
+    """
+    segment_log = path.with_suffix(".log")
+    with open(segment_log, "w") as log:
+        try:
+            run_pipeline(
+                vspipe_command(job, 0, "y4m", frames),
+                video_command(config, threads, path),
+                log,
+                track_progress(job, idx),
+            )
+        except EncodeError:
+            if job.failed_log is None:
+                job.failed_log = segment_log
+            raise
+        finally:
+            finish_segment(job, idx)
+
+
+def encode_episode_chunked(job: EpisodeJob, config, workers: int):
+    """
+    Encodes one episode as segments cut at the raw's keyframes, workers
+    at a time, then appends them into one stream with mkvmerge. Each
+    segment is a separate x264 run with the same settings and starts
+    on an IDR frame, so appending them needs no re-encode.
+    """
+    write_script(job, config)
+    job.frames, fps = clip_info(job.script)
+    if not job.frames:
+        raise EncodeError(f"vspipe did not report a frame count for {job.script.name}")
+
+    segments = plan_segments(
+        job.frames, source_keyframes(job.raw, fps), workers * SEGMENTS_PER_WORKER
+    )
+    paths = [job.work_dir / f"segment_{idx:03d}.mkv" for idx in range(len(segments))]
+    job.segment_frames = [0] * len(segments)
+    job.segment_fps = [0.0] * len(segments)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    with open(job.log, "w") as log:
+        # Audio runs beside the segment pool so every worker encodes video
+        with ThreadPoolExecutor(max_workers=1) as audio_executor:
+            audio = audio_executor.submit(encode_audio, job, config, log)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(
+                        encode_segment, job, config, threads, idx, frames, path
+                    )
+                    for idx, (frames, path) in enumerate(zip(segments, paths))
+                ]
+                try:
+                    for future in futures:
+                        future.result()
+                except Exception:
+                    # Segments not started yet are pointless once one failed
+                    executor.shutdown(cancel_futures=True)
+                    raise
+            audio.result()
+
+        append = [str(paths[0])]
+        for path in paths[1:]:
+            append += ["+", str(path)]
+        subprocess.run(
+            ["mkvmerge", "-q", "-o", str(job.video), *append],
+            stdout=log,
+            stderr=log,
+            check=True,
+        )
+        merge_output(job, log)
+
+
+def last_log_line(job: EpisodeJob):
+    try:
+        with open(job.failed_log or job.log, "r", errors="replace") as f:
+            lines = [line.strip() for line in f if line.strip()]
+    except OSError:
+        return None
+    return lines[-1] if lines else None
+
+
+def run_job(job: EpisodeJob, config, threads: int, segment_workers=None):
+    """
+    Encodes one episode and returns a result dict with its status,
+    error message and elapsed seconds. Errors are returned, never
+    raised, so one episode never aborts the batch.
+    With segment_workers the episode is encoded in chunks.
+    """
+    job.started = time.perf_counter()
+    result = {"episode": job.episode, "status": "OK", "error": None}
+
+    try:
+        if not job.raw.exists():
+            raise EncodeError(f"Raw not found: {job.raw}")
+        if segment_workers:
+            encode_episode_chunked(job, config, segment_workers)
+        else:
+            encode_episode(job, config, threads)
+        shutil.rmtree(job.work_dir, ignore_errors=True)
+    except Exception as e:
+        result["status"] = "FAILED"
+        result["error"] = str(e) or type(e).__name__
+        detail = last_log_line(job)
+        if detail:
+            result["error"] += f" ({detail})"
+
+    result["elapsed"] = time.perf_counter() - job.started
+    return result
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def print_progress(jobs):
+    for job in jobs:
+        line = f"[{job.episode:02d}] "
+        if job.frames:
+            line += f"{job.frame}/{job.frames} frames ({job.frame / job.frames:.0%})"
+        else:
+            line += f"{job.frame} frames"
+        line += f"  {job.fps:.1f} fps"
+        eta = job.eta()
+        if eta is not None:
+            line += f"  ETA {format_duration(eta)}"
+        print(line, flush=True)
+
+
+def run_jobs(jobs, config, workers: int, chunked: bool = False):
+    """
+    Runs every job on a pool of worker threads, which only wait on the
+    encoder processes. In chunked mode episodes run one at a time and
+    workers is the number of segments encoded at once.
+    Progress of the running episodes is printed every PROGRESS_INTERVAL
+    seconds.
+    """
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    segment_workers = workers if chunked else None
+    results = []
+
+    with ThreadPoolExecutor(max_workers=1 if chunked else workers) as executor:
+        futures = {
+            executor.submit(run_job, job, config, threads, segment_workers): job
+            for job in jobs
+        }
+        pending = set(futures)
+        last_progress = time.perf_counter()
+
+        while pending:
+            done, pending = wait(
+                pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                result = future.result()
+                results.append(result)
+                mark = "✓" if result["status"] == "OK" else "✗"
+                print(
+                    f"{mark} Episode {result['episode']:02d} "
+                    f"{result['status']} in {format_duration(result['elapsed'])}",
+                    flush=True,
+                )
+
+            if time.perf_counter() - last_progress >= PROGRESS_INTERVAL:
+                running = [futures[future] for future in pending]
+                print_progress(
+                    sorted(
+                        (job for job in running if job.started),
+                        key=lambda job: job.episode,
+                    )
+                )
+                last_progress = time.perf_counter()
+
+    return sorted(results, key=lambda result: result["episode"])
+
+
+def print_results_table(results):
+    print(f"\n{'Episode':<9}{'Status':<9}{'Time':>9}")
+    for result in results:
+        line = f"{result['episode']:02d}{'':<7}{result['status']:<9}{format_duration(result['elapsed']):>9}"
+        if result["error"]:
+            line += f"  {result['error']}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Encode the raws of a project with VapourSynth, x264 and qaac",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python encode.py ultraman/nexus
+  python encode.py ultraman/nexus --episodes 1-5 --jobs 2
+  python encode.py ultraman/nexus --episodes 25 --chunked
+  python encode.py ultraman/nexus --plan
+
+Configuration (optional [encode] table in config.toml):
+  raws_path          Folder with the raws (default: ./raws)
+  raw_name           Raw file name (default: "{episode:02d}.mkv")
+  output_path        Output folder (default: the episode folder,
+                     where mux.py looks for the video)
+  crf, preset        x264 settings (default: 21, slow)
+  audio_quality      qaac -V value (default: 91)
+  memory_per_job_mb  Memory budget per episode (or segment with
+                     --chunked) for the default --jobs (default: 2048)
+
+Chunked Mode:
+  Each episode is cut at the raw's keyframes (found with ffprobe, or
+  evenly without it) into segments that are encoded --jobs at a time
+  with the same x264 settings, then appended losslessly with mkvmerge.
+  Episodes are encoded one after another.
+
+Exit Codes:
+  0 - Success
+  1 - Failure (some episodes failed or a tool is missing)
+        """,
+    )
+    parser.add_argument("project_path", help="Folder containing config.toml")
+    parser.add_argument(
+        "--episodes",
+        help="Episode range to encode (e.g., 1, 1-5; default: episodes from config.toml)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Episodes (or segments with --chunked) encoded at the same time (default: from cores and memory)",
+    )
+    parser.add_argument(
+        "--chunked",
+        action="store_true",
+        help="Split each episode at keyframes and encode the segments in parallel",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Encode every episode, even when the output is newer than the raw",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Print the raws and outputs of every episode and exit without encoding",
+    )
+    args = parser.parse_args()
+
+    project_dir = Path(args.project_path).resolve()
+    if not (project_dir / "config.toml").exists():
+        print(f"No config.toml found in: {project_dir}")
+        sys.exit(1)
+
+    config = load_config(project_dir)
+    config["project_dir"] = project_dir
+
+    try:
+        episodes = parse_range(args.episodes) if args.episodes else config["episodes"]
+    except ValueError:
+        print(f"Error: Invalid range '{args.episodes}'")
+        sys.exit(1)
+
+    jobs = [EpisodeJob(ep, config) for ep in episodes]
+
+    if args.plan:
+        for job in jobs:
+            state = "up to date" if job.is_up_to_date() else "pending"
+            if not job.raw.exists():
+                state = "raw missing"
+            print(f"{job.episode:02d}  {job.raw} → {job.output}  ({state})")
+        return
+
+    missing = [tool for tool in TOOLS if shutil.which(tool) is None]
+    if missing:
+        print(f"Error: Not found in PATH: {', '.join(missing)}")
+        sys.exit(1)
+
+    pending = []
+    results = []
+    for job in jobs:
+        if not args.force and job.is_up_to_date():
+            print(f"Episode {job.episode:02d} is up to date, skipping")
+            results.append(
+                {
+                    "episode": job.episode,
+                    "status": "SKIPPED",
+                    "error": None,
+                    "elapsed": 0.0,
+                }
+            )
+        else:
+            pending.append(job)
+
+    threads_per_job = THREADS_PER_SEGMENT if args.chunked else THREADS_PER_JOB
+    workers = args.jobs or default_jobs(
+        config["encode"]["memory_per_job_mb"], threads_per_job
+    )
+    if workers < 1:
+        print("Jobs must be at least 1")
+        sys.exit(1)
+
+    if pending:
+        if args.chunked:
+            print(f"Encoding {len(pending)} episode(s) in chunks, {workers} at a time")
+            results.extend(run_jobs(pending, config, workers, chunked=True))
+        else:
+            print(f"Encoding {len(pending)} episode(s) with {workers} job(s)")
+            results.extend(run_jobs(pending, config, min(workers, len(pending))))
+    results.sort(key=lambda result: result["episode"])
+
+    print_results_table(results)
+
+    failed = [result["episode"] for result in results if result["status"] == "FAILED"]
+    if failed:
+        print(
+            f"\n{len(failed)} episode(s) failed: {', '.join(f'{ep:02d}' for ep in failed)}"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,35 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import os
+import csv
 import sys
+import copy
+import math
+import json
+import time
+import pickle
+import cProfile
+import hashlib
+import logging
 import tomllib
 import shutil
-from ass import Comment
+import argparse
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from ass import Comment, parse_file as parse_ass_file
+from ass.section import LineSection
 from pathlib import Path
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 from muxtools import (
     Setup,
-    GlobSearch,
     Premux,
     SubFile,
     Chapters,
@@ -17,8 +37,13 @@ from muxtools import (
     ASSHeader,
     mux,
     TmdbConfig,
+    FontFile,
+    get_workdir,
 )
-from muxtools.utils.log import debug, error, info, warn, log_escape
+from muxtools.muxing.tmdb import MediaMetadata, EpisodeMetadata
+from muxtools.utils.log import debug, error, info, warn, danger, log_escape, logger
+
+from ass_events import load_events
 
 
 def ensure_muxtools_installed():
@@ -31,14 +56,57 @@ def ensure_muxtools_installed():
         sys.exit(1)
 
 
-def get_project_path():
-    if len(sys.argv) < 2:
-        print(
-            "Usage: python mux.py <project_path>\nExample: python mux.py franchise/show"
-        )
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Batch mux the episodes of a project",
+        epilog="Example: python mux.py franchise/show --jobs 4",
+    )
+    parser.add_argument("project_path", help="Folder containing config.toml")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of episodes muxed at the same time (default: 1)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Mux every episode, even when its inputs have not changed since the last run",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time every stage of each episode and write _profile/profile.json and .csv",
+    )
+    parser.add_argument(
+        "--profile-dump",
+        action="store_true",
+        help="Also write a cProfile dump per episode to _profile/NN.prof (implies --profile)",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Resolve and check every episode's inputs, print the plan and exit without muxing",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Use only cached TMDB metadata, never the network",
+    )
+    args = parser.parse_args()
+    args.profile = args.profile or args.profile_dump
+
+    if args.jobs < 1:
+        print("Jobs must be at least 1")
         sys.exit(1)
 
-    project_path = Path(sys.argv[1])
+    return args
+
+
+def get_project_path(project_path):
+    project_path = Path(project_path)
     if not project_path.exists():
         print(f"Project path not found: {project_path}")
         sys.exit(1)
@@ -51,7 +119,33 @@ def get_project_path():
     return project_path.resolve(), config_file
 
 
-PROJECT_DIR, CONFIG_PATH = get_project_path()
+# Set by load_project()
+PROJECT_DIR = None
+CONFIG = None
+MERGE_RULES = []
+TMDB_CACHE = None
+WORK_DIR = None
+PROFILE_DIR = None
+
+
+def load_project(project_path, offline: bool = False):
+    """
+    Loads the project's config and everything derived from it into the
+    module globals. main() calls it once, and so does every worker
+    process when it starts.
+    """
+    global PROJECT_DIR, CONFIG, MERGE_RULES, TMDB_CACHE, WORK_DIR, PROFILE_DIR
+
+    PROJECT_DIR, config_path = get_project_path(project_path)
+    CONFIG = load_config(config_path)
+    MERGE_RULES = parse_extras_merge_config()
+    TMDB_CACHE = TmdbCache(
+        PROJECT_DIR / TMDB_CACHE_NAME,
+        CONFIG.get("tmdb_cache_days", TMDB_CACHE_DAYS),
+        offline,
+    )
+    WORK_DIR = PROJECT_DIR / "_workdir"
+    PROFILE_DIR = PROJECT_DIR / "_profile"
 
 
 def parse_episodes(value):
@@ -87,7 +181,8 @@ def load_config(cfg_path: Path):
         if key in data:
             data[key] = (PROJECT_DIR / Path(data[key])).resolve()
 
-    for path_key in ("episodes_path", "extras_path", "output_path"):
+    data.setdefault("fonts_path", "./common/fonts")
+    for path_key in ("episodes_path", "extras_path", "output_path", "fonts_path"):
         resolve_path(path_key)
 
     data["episodes"] = parse_episodes(data["episodes"])
@@ -95,9 +190,6 @@ def load_config(cfg_path: Path):
     return data
 
 
-CONFIG = load_config(CONFIG_PATH)
-
-
 def validate_paths():
     episodes_path = CONFIG["episodes_path"]
     extras_path = CONFIG.get("extras_path")
@@ -132,9 +224,6 @@ def parse_extras_merge_config():
     return merge_rules
 
 
-MERGE_RULES = parse_extras_merge_config()
-
-
 def get_merge_files_for_episode(ep: int):
     for start, end, files in MERGE_RULES:
         if start <= ep <= end:
@@ -143,9 +232,113 @@ def get_merge_files_for_episode(ep: int):
     return {}
 
 
-def configure_subtitles(sub: SubFile):
+class ExtrasCache:
+    """
+    Parsed extras (OP/ED songs) keyed by path and mtime.
+    Every song file is parsed once per process and handed out as a
+    shallow copy, so merge() can drop the sync line from its own event
+    list without touching the cached document. Shifted lines are deep
+    copied by muxtools, so the cached lines themselves are never edited.
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self.parse_times = {}
+        self.stats = {"parsed": 0, "reused": 0, "parse_time": 0.0, "saved_time": 0.0}
+
+    def covers(self, path: Path):
+        extras_path = CONFIG.get("extras_path")
+        return extras_path is not None and path.parent == extras_path
+
+    def get(self, path: Path, parse):
+        key = (path, path.stat().st_mtime_ns)
+        doc = self.docs.get(key)
+
+        if doc is None:
+            start = time.perf_counter()
+            doc = parse(path)
+            elapsed = time.perf_counter() - start
+            self.docs[key] = doc
+            self.parse_times[key] = elapsed
+            self.stats["parsed"] += 1
+            self.stats["parse_time"] += elapsed
+        else:
+            self.stats["reused"] += 1
+            self.stats["saved_time"] += self.parse_times[key]
+
+        return copy_document(doc)
+
+    def take_stats(self):
+        """
+        Returns the counters gathered since the last call and resets them,
+        so every episode result carries only its own share.
+        """
+        stats = self.stats
+        self.stats = {key: type(value)() for key, value in stats.items()}
+        return stats
+
+
+def copy_document(doc):
+    clone = copy.copy(doc)
+    clone.sections = type(doc.sections)(doc.sections.items())
+    for name, section in doc.sections.items():
+        if isinstance(section, LineSection):
+            section_copy = copy.copy(section)
+            section_copy.set_data(list(section))
+            clone.sections[name] = section_copy
+    return clone
+
+
+EXTRAS_CACHE = ExtrasCache()
+
+
+class CachedExtrasSubFile(SubFile):
+    """
+    SubFile that reads extras through EXTRAS_CACHE instead of parsing
+    them from disk on every merge, and cleans and configures the
+    document in a single pass.
+    """
+
+    def _read_doc(self, file=None):
+        if file is not None:
+            path = Path(file).resolve()
+            if EXTRAS_CACHE.covers(path):
+                return EXTRAS_CACHE.get(path, super()._read_doc)
+        return super()._read_doc(file)
+
+    def document(self):
+        """
+        Returns the current file parsed, through the same private
+        _read_doc() as clean_and_set_headers().
+        """
+        return self._read_doc()
+
+    def clean_and_set_headers(self, *headers):
+        """
+        clean_garbage(), clean_extradata(), clean_comments() and
+        set_headers() in one read and write of the document instead of
+        four. Uses the same private SubFile helpers as set_headers(),
+        which may change between muxtools releases (written for 0.4).
+        """
+        doc = self._read_doc()
+        doc.sections.pop("Aegisub Project Garbage", None)
+        doc.sections.pop("Aegisub Extradata", None)
+        doc.events = [
+            line for line in doc.events if str(line.TYPE).lower() != "comment"
+        ]
+        for header, value in headers:
+            self._set_header(header, value, doc)
+        self._update_doc(doc)
+        return self
+
+
+def configure_subtitles(sub: CachedExtrasSubFile):
+    """
+    Drops the Aegisub garbage and extradata sections and every comment
+    line, then sets the script headers from the config.
+    """
     width, height = CONFIG["resolution"]
-    sub.clean_garbage().clean_extradata().set_headers(
+    sub.clean_and_set_headers(
         (ASSHeader.PlayResX, width),
         (ASSHeader.PlayResY, height),
         (ASSHeader.LayoutResX, width),
@@ -157,82 +350,795 @@ def configure_subtitles(sub: SubFile):
     )
 
 
-def process_episode(ep: int):
-    info("=" * 70)
-    info(f"Processing episode {ep:02d}")
+FONT_INDEX_NAME = ".fontindex"
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc", ".otc")
 
-    setup = Setup(
-        f"{ep:02d}",
-        config_file="",
-        show_name=CONFIG["show_name"],
-        out_name=rf"[{CONFIG['fansub_group']}] $show$ - $ep$ [{CONFIG['video_resolution']}] [{CONFIG['video_source']}] [$crc32$]",
-        mkv_title_naming=R"$show$ - $ep$ - $title$",
-        out_dir=str(CONFIG["output_path"]),
-        clean_work_dirs=True,
-        error_on_danger=True,
-        work_dir=str(PROJECT_DIR / "_workdir"),
-    )
 
-    episode_dir = CONFIG["episodes_path"] / setup.episode
-    video_file = GlobSearch("*.mkv", dir=str(episode_dir))
-    setup.set_default_sub_timesource(video_file)
-
-    premux = Premux(
-        video_file,
-        subtitles=None,
-        keep_attachments=False,
-        mkvmerge_args=[
-            "--no-global-tags",
-            "--no-chapters",
-            "--language",
-            f"1:{CONFIG['audio_lang_code']}",
-        ],
+def list_font_files(fonts_path: Path):
+    """
+    Returns (relative path, size, mtime) for every font file under
+    fonts_path, subfolders included. Used to tell whether the project
+    fonts changed without reading them.
+    """
+    if not fonts_path.exists():
+        return ()
+    return tuple(
+        (str(path.relative_to(fonts_path)), stat.st_size, stat.st_mtime_ns)
+        for path in sorted(fonts_path.rglob("*"))
+        if path.suffix.lower() in FONT_EXTENSIONS
+        for stat in (path.stat(),)
     )
 
-    subtitle = SubFile(GlobSearch("*.ass", allow_multiple=True, dir=str(episode_dir)))
-    chapters = Chapters.from_sub(subtitle, use_actor_field=True)
-
-    merge_files = get_merge_files_for_episode(ep)
-    if merge_files:
-        for path, (from_marker, to_marker) in merge_files.items():
-            debug(f"Merging extra {path.name}: {from_marker} → {to_marker}")
-            subtitle.merge(
-                str(path),
-                from_marker,
-                to_marker,
-                no_error=True,
-                shift_mode=ShiftMode.FRAME,
+
+class FontIndex:
+    """
+    Maps lowercased family and exact font names to the font files that
+    provide them, so resolving a style only scores the faces that can
+    actually match it instead of every installed font.
+
+    Project fonts are parsed once and pickled to PROJECT_DIR/.fontindex,
+    which is reused until a font under fonts_path is added, removed or
+    modified. System fonts go through font_collector's own cache.
+    Resolved styles are memoized for the lifetime of the process.
+    """
+
+    def __init__(self, fonts_path: Path, use_system_fonts: bool = True):
+        from font_collector import FontLoader, FontSelectionStrategyLibass
+
+        self.fonts_path = fonts_path
+        self.strategy = FontSelectionStrategyLibass()
+        self.files_by_name = {}
+        self.resolved = {}
+
+        font_files = []
+        if use_system_fonts:
+            font_files.extend(FontLoader.load_system_fonts())
+            font_files.extend(FontLoader.load_generated_fonts())
+        font_files.extend(self._load_project_fonts())
+
+        # Same order as FontCollection.fonts, which matters for ties
+        for font_file in font_files:
+            for face in font_file.font_faces:
+                names = {name.value.lower() for name in face.family_names}
+                names.update(name.value.lower() for name in face.exact_names)
+                for name in names:
+                    files = self.files_by_name.setdefault(name, [])
+                    if font_file not in files:
+                        files.append(font_file)
+
+        self.file_count = len(font_files)
+
+    def _load_project_fonts(self):
+        from font_collector import FontLoader, __version__
+
+        index_file = PROJECT_DIR / FONT_INDEX_NAME
+        signature = list_font_files(self.fonts_path)
+
+        try:
+            with open(index_file, "rb") as f:
+                data = pickle.load(f)
+            if data["version"] == __version__ and data["signature"] == signature:
+                debug(
+                    f"Loaded {len(data['fonts'])} project fonts from {FONT_INDEX_NAME}"
+                )
+                return data["fonts"]
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError, AttributeError):
+            pass
+
+        if not signature:
+            return []
+
+        fonts = FontLoader.load_additional_fonts([self.fonts_path], scan_subdirs=True)
+
+        tmp_file = index_file.with_suffix(".tmp")
+        with open(tmp_file, "wb") as f:
+            pickle.dump(
+                {"version": __version__, "signature": signature, "fonts": fonts}, f
+            )
+        os.replace(tmp_file, index_file)
+        debug(f"Indexed {len(fonts)} project fonts into {FONT_INDEX_NAME}")
+
+        return fonts
+
+    def resolve(self, style):
+        """
+        Returns the FontResult for an AssStyle, or None if no font matches.
+        """
+        if style not in self.resolved:
+            from font_collector import FontCollection
+
+            candidates = FontCollection(
+                use_system_font=False,
+                use_generated_fonts=False,
+                additional_fonts=self.files_by_name.get(style.fontname.lower(), []),
+            )
+            self.resolved[style] = candidates.get_used_font_by_style(
+                style, self.strategy
             )
+        return self.resolved[style]
+
+
+FONT_INDEX = None
+
+
+def get_font_index():
+    global FONT_INDEX
+    if FONT_INDEX is None:
+        from font_collector import set_loglevel
+
+        set_loglevel(logging.CRITICAL)
+        start = time.perf_counter()
+        FONT_INDEX = FontIndex(CONFIG["fonts_path"])
+        debug(
+            f"Font index ready: {FONT_INDEX.file_count} font files "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+    return FONT_INDEX
+
+
+# usWeightClass names muxtools puts in attachment names, regular has none
+FONT_WEIGHT_NAMES = {
+    100: "Thin",
+    200: "ExtraLight",
+    300: "Light",
+    400: "",
+    500: "Medium",
+    600: "SemiBold",
+    700: "Bold",
+    800: "ExtraBold",
+    900: "Black",
+}
+
+
+def font_attachment_name(face, is_variable: bool):
+    """
+    Returns the name muxtools' own collect_fonts gives the attachment
+    of a face: the family name run together, then weight and italic.
+    """
+    found = face.get_family_name_from_lang("en") or face.get_best_family_name()
+    name = found.value.replace("/", " ").replace("\\", " ")
+    if " " in name:
+        name = "".join(
+            part.capitalize() if part.islower() else part for part in name.split(" ")
+        )
     else:
-        debug(f"No extra merges for episode {ep:02d}")
-
-    # Add credits from config.toml to the subtitle file before further processing
-    add_credits(
-        subtitle,
-        CONFIG.get("fansub_group", ""),
-        CONFIG.get("translation", ""),
-        CONFIG.get("editing", ""),
-        CONFIG.get("translation_checking", ""),
-        CONFIG.get("timing", ""),
-        CONFIG.get("typesetting", ""),
-        CONFIG.get("quality_checking", ""),
-    )
+        name = name.capitalize()
+
+    if is_variable:
+        return name + "-VariableCollection" + ("Italic" if face.is_italic else "")
+
+    weight = FONT_WEIGHT_NAMES.get(face.weight, face.weight)
+    if weight:
+        name += f"-{weight}"
+    if face.is_italic:
+        name += ("" if weight else "-") + "Italic"
+    return name
+
+
+def collect_fonts(sub: CachedExtrasSubFile):
+    """
+    Resolves the fonts used by the styles and \\fn tags of sub against
+    the font index and copies them into the episode work directory.
+    Attachments are named after the font family like muxtools does, and
+    each source file is copied once even when several faces use it.
+    """
+    from font_collector import AssDocument, VariableFontFace
+
+    info(f"Collecting fonts for '{sub.file.stem}'...")
+    index = get_font_index()
+    styles = AssDocument(sub.document()).get_used_style(True)
+    collected = {}
+    copied_sources = {}
+    target_sources = {}
+
+    for style, usage_data in styles.items():
+        query = index.resolve(style)
+        if not query:
+            danger(f"Font '{style.fontname}' was not found!")
+            continue
+
+        face = query.font_face
+        source = Path(face.font_file.filename)
+        family_name = face.get_best_family_name().value
+        is_variable = isinstance(face, VariableFontFace)
+        fontname = font_attachment_name(face, is_variable)
+        suffix = ".ttc" if is_variable else source.suffix
+        # Each variable instance becomes its own collection, while the
+        # faces of a static .ttc all share one copy of it
+        source_key = (source, fontname) if is_variable else source
+
+        target = copied_sources.get(source_key)
+        if target is None:
+            target = get_workdir() / f"{fontname}{suffix}"
+            counter = 1
+            while target in target_sources:
+                counter += 1
+                target = get_workdir() / f"{fontname} {counter}{suffix}"
+            if counter > 1:
+                warn(
+                    f"'{source}' would be attached as '{fontname}{suffix}' like "
+                    f"'{target_sources[get_workdir() / f'{fontname}{suffix}']}', "
+                    f"attaching it as '{target.name}' instead."
+                )
+
+            if is_variable:
+                info(f"Converting '{family_name}' variable font to a collection.")
+                face.variable_font_to_collection(target)
+            else:
+                shutil.copy(source, target)
+            copied_sources[source_key] = target
+            target_sources[target] = source
+
+        if face not in collected:
+            info(f"Found font '{family_name}'.")
+            collected[face] = target
+
+        if query.need_faux_bold:
+            warn(
+                f"Faux bold used for '{family_name}' (requested weight {style.weight}, got {face.weight})!"
+            )
+        elif query.mismatch_bold:
+            warn(
+                f"Mismatched weight for '{family_name}' (requested weight {style.weight}, got {face.weight})!"
+            )
+
+        if query.mismatch_italic:
+            warn(
+                f"Could not find a requested {'non-' if face.is_italic else ''}italic variant for '{family_name}'!"
+            )
+
+        missing_glyphs = face.get_missing_glyphs(usage_data.characters_used)
+        if missing_glyphs:
+            danger(f"'{family_name}' is missing the following glyphs: {missing_glyphs}")
+
+    return [FontFile(path) for path in dict.fromkeys(collected.values())]
+
+
+TMDB_CACHE_NAME = ".tmdbcache.json"
+TMDB_CACHE_DAYS = 30
+
+
+class TmdbCache:
+    """
+    TMDB responses stored as JSON under the project directory.
+    Entries older than the TTL are refetched, but are still served when
+    running with --offline or when the refetch fails.
+    """
+
+    def __init__(self, path: Path, ttl_days: float, offline: bool = False):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.offline = offline
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data.setdefault("media", {})
+        data.setdefault("episodes", {})
+        return data
+
+    def get(self, section: str, key: str, allow_stale: bool = False):
+        entry = self.data[section].get(key)
+        if entry is None:
+            return None
+        if not allow_stale and time.time() - entry["fetched"] > self.ttl:
+            return None
+        return entry["data"]
 
-    configure_subtitles(subtitle)
-    fonts = subtitle.collect_fonts(use_system_fonts=True)
-    debug(f"Collected {len(fonts)} fonts")
+    def put(self, section: str, entries):
+        # Reload first so entries written by other workers are kept
+        self.data = self._load()
+        fetched = time.time()
+        for key, value in entries.items():
+            self.data[section][key] = {"fetched": fetched, "data": value}
+
+        tmp_file = self.path.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.path)
+
+
+class CachedTmdbConfig(TmdbConfig):
+    """
+    TmdbConfig that serves media and episode metadata from TMDB_CACHE.
+    Misses go through the public TmdbConfig methods and their results
+    are cached. muxtools requests a whole season on the first episode
+    lookup of an instance, so prefetching every episode on one instance
+    costs a single season request.
+    """
 
-    subtitle = subtitle.clean_comments().clean_garbage()
+    def _order_key(self):
+        if isinstance(self.order, str):
+            return self.order
+        return self.order.name if self.order else "default"
 
-    mux(
-        premux,
-        subtitle.to_track(CONFIG["sub_language"], CONFIG["sub_lang_code"]),
-        *fonts,
-        chapters,
-        tmdb=TmdbConfig(CONFIG["tmdb_id"]),
+    def _media_key(self):
+        return f"{'movie' if self.movie else 'tv'}/{self.id}:{self.language}"
+
+    def _episode_key(self, index: int):
+        return f"tv/{self.id}:{self.season}:{self._order_key()}:{self.language}:{index}"
+
+    def _cached(self, section: str, key: str, fetch, *args):
+        data = TMDB_CACHE.get(section, key, allow_stale=TMDB_CACHE.offline)
+        if data is not None:
+            return data
+        if TMDB_CACHE.offline:
+            raise error(f"No cached TMDB metadata for {key} (--offline)", self)
+
+        try:
+            data = asdict(fetch(*args))
+        except Exception as e:
+            data = TMDB_CACHE.get(section, key, allow_stale=True)
+            if data is None:
+                raise
+            warn(f"TMDB request failed, using expired cache for {key}: {e}", self)
+            return data
+
+        TMDB_CACHE.put(section, {key: data})
+        return data
+
+    def get_media_meta(self) -> MediaMetadata:
+        fetch = super().get_media_meta
+        return MediaMetadata(**self._cached("media", self._media_key(), fetch))
+
+    def get_episode_meta(self, num: int) -> EpisodeMetadata:
+        key = self._episode_key(num + self.offset)
+        fetch = super().get_episode_meta
+        return EpisodeMetadata(**self._cached("episodes", key, fetch, num))
+
+
+def prefetch_tmdb_metadata(episodes):
+    """
+    Warms the TMDB cache from the main process, so parallel workers
+    only ever read it.
+    """
+    tmdb = CachedTmdbConfig(CONFIG["tmdb_id"])
+    try:
+        tmdb.get_media_meta()
+        for ep in episodes:
+            tmdb.get_episode_meta(ep)
+    except Exception as e:
+        warn(f"Could not prefetch TMDB metadata: {e}")
+
+
+PROFILE_FIELDS = (
+    "wall",
+    "peak_rss_so_far_mb",
+    "disk_read_bytes",
+    "disk_written_bytes",
+)
+
+
+def read_io_counters():
+    """
+    Returns (bytes read, bytes written) from disk so far by this process
+    and its finished children, such as mkvmerge. Block I/O is the one
+    counter both report; reads served from the page cache do not count.
+    """
+    if resource is None:
+        return 0, 0
+
+    read = written = 0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        read += usage.ru_inblock * 512
+        written += usage.ru_oublock * 512
+    return read, written
+
+
+def peak_rss_mb():
+    """
+    Peak RSS of this process or its largest finished child over their
+    whole lifetime, not of any one stage.
+    """
+    if resource is None:
+        return 0.0
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
     )
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    scale = 1 if sys.platform == "darwin" else 1024
+    return peak * scale / (1 << 20)
+
+
+class EpisodeProfile:
+    """
+    Collects wall time and disk I/O for every stage of one episode,
+    along with the peak RSS reached by the end of the stage.
+    """
+
+    def __init__(self, episode: int):
+        self.episode = episode
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str):
+        read, written = read_io_counters()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            end_read, end_written = read_io_counters()
+            self.stages.append(
+                {
+                    "stage": name,
+                    "wall": elapsed,
+                    "peak_rss_so_far_mb": peak_rss_mb(),
+                    "disk_read_bytes": end_read - read,
+                    "disk_written_bytes": end_written - written,
+                }
+            )
+
+
+EPISODE_PROFILE = None
+
+
+def profile_stage(name: str):
+    if EPISODE_PROFILE is None:
+        return nullcontext()
+    return EPISODE_PROFILE.stage(name)
+
+
+class EpisodeLogFilter(logging.Filter):
+    """
+    Prefixes every muxtools log record with the episode being processed,
+    so interleaved output from parallel workers stays readable.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.episode = None
+
+    def filter(self, record):
+        if self.episode is not None:
+            record.msg = f"[{self.episode:02d}] {record.msg}"
+        return True
+
+
+EPISODE_LOG_FILTER = EpisodeLogFilter()
+logger.addFilter(EPISODE_LOG_FILTER)
+
+
+MANIFEST_NAME = ".mux-manifest.json"
+MANIFEST_VERSION = 1
+
+# Keys that do not change the muxed output of an episode on their own.
+# Extras are fingerprinted per episode from the merge rules instead.
+FINGERPRINT_IGNORED_KEYS = (
+    "episodes",
+    "episodes_path",
+    "extras_path",
+    "output_path",
+    "fonts_path",
+    "extras",
+)
+
+
+def hash_file(path: Path):
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def fingerprint_episode(plan):
+    """
+    Hashes every input that ends up in the muxed file of an episode.
+    Video files are fingerprinted by size and mtime since hashing
+    several GB per episode would cost more than the mux itself.
+    """
+    sha1 = hashlib.sha1()
+
+    def feed(*parts):
+        sha1.update("\0".join(str(part) for part in parts).encode("utf-8") + b"\n")
+
+    if plan.video:
+        stat = plan.video.stat()
+        feed("video", plan.video.name, stat.st_size, stat.st_mtime_ns)
+
+    for sub in plan.subtitles:
+        feed("sub", sub.name, hash_file(sub))
+
+    for path, from_marker, to_marker in plan.merges:
+        feed("extra", path.name, from_marker, to_marker, hash_file(path))
+
+    for name, size, mtime in list_font_files(CONFIG["fonts_path"]):
+        feed("font", name, size, mtime)
+
+    settings = {
+        key: value
+        for key, value in CONFIG.items()
+        if key not in FINGERPRINT_IGNORED_KEYS
+    }
+    feed("config", json.dumps(settings, sort_keys=True, default=str))
+
+    return sha1.hexdigest()
+
+
+def load_manifest():
+    """
+    Returns {episode: {"fingerprint": ..., "output": ...}} from the
+    manifest in the output directory, or {} when it is missing or stale.
+    """
+    try:
+        with open(CONFIG["output_path"] / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("episodes", {})
+
+
+def save_manifest(entries):
+    output_path = CONFIG["output_path"]
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    manifest_file = output_path / MANIFEST_NAME
+    tmp_file = manifest_file.with_suffix(".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "episodes": entries}, f, indent=2)
+    os.replace(tmp_file, manifest_file)
+
+
+def is_up_to_date(entry, fingerprint: str):
+    if not entry or entry.get("fingerprint") != fingerprint:
+        return False
+    return (CONFIG["output_path"] / entry["output"]).exists()
+
+
+class EpisodePlan:
+    """
+    Every input of one episode, resolved before any muxing starts.
+    Plans are built in the main process and handed to the workers, so
+    the parallel and incremental modes never glob or re-check inputs.
+    """
+
+    def __init__(self, episode: int):
+        self.episode = episode
+        self.episode_dir = CONFIG["episodes_path"] / f"{episode:02d}"
+        self.video = None
+        self.subtitles = []
+        self.merges = []
+        self.fonts = set()
+        self.errors = []
+        self.warnings = []
+        self.fingerprint = None
+
+
+@lru_cache(maxsize=None)
+def file_markers(path: Path):
+    """
+    Returns every lowercased Effect and Text value in an .ass file,
+    which is where SubFile.merge() looks for sync points.
+    """
+    markers = set()
+    for event in load_events(path):
+        markers.add(event.effect.lower().strip())
+        markers.add(event.text.lower().strip())
+    return markers
+
+
+@lru_cache(maxsize=None)
+def file_used_styles(path: Path):
+    """
+    Returns the font styles used by an .ass file, including \\fn overrides.
+    Cached since every episode of a merge range shares the same extras.
+    """
+    from font_collector import AssDocument
+
+    with open(path, "r", encoding="utf_8_sig") as f:
+        return frozenset(AssDocument(parse_ass_file(f)).get_used_style(True))
+
+
+def plan_episode(ep: int, check_fonts: bool = False):
+    plan = EpisodePlan(ep)
+    if not plan.episode_dir.is_dir():
+        plan.errors.append(f"Episode folder not found: {plan.episode_dir}")
+        return plan
+
+    videos = sorted(plan.episode_dir.rglob("*.mkv"))
+    if not videos:
+        plan.errors.append(f"No .mkv found in {plan.episode_dir}")
+    else:
+        plan.video = videos[0]
+        if len(videos) > 1:
+            plan.warnings.append(
+                f"{len(videos)} .mkv files found, using {plan.video.name}"
+            )
+
+    plan.subtitles = sorted(plan.episode_dir.rglob("*.ass"))
+    if not plan.subtitles:
+        plan.errors.append(f"No .ass found in {plan.episode_dir}")
+
+    episode_markers = set()
+    for sub in plan.subtitles:
+        episode_markers.update(file_markers(sub))
+
+    # Config order is the order the extras are merged in
+    for path, (from_marker, to_marker) in get_merge_files_for_episode(ep).items():
+        if not path.exists():
+            plan.errors.append(f"Extra not found: {path}")
+            continue
+
+        plan.merges.append((path, from_marker, to_marker))
+        # merge() runs with no_error and muxtools falls back without the
+        # markers, so they are worth a warning but do not stop the mux
+        if from_marker.lower().strip() not in episode_markers:
+            plan.warnings.append(
+                f"Sync marker '{from_marker}' for {path.name} not found in the episode"
+            )
+        if to_marker.lower().strip() not in file_markers(path):
+            plan.warnings.append(f"Sync marker '{to_marker}' not found in {path.name}")
+
+    if check_fonts and plan.subtitles:
+        check_plan_fonts(plan)
+
+    if not plan.errors:
+        plan.fingerprint = fingerprint_episode(plan)
+
+    return plan
+
+
+def check_plan_fonts(plan):
+    """
+    Resolves the fonts used by the episode and its extras against the
+    font index. A missing font would stop the mux, since the Setup
+    uses error_on_danger.
+    """
+    index = get_font_index()
+    styles = set()
+    for path in plan.subtitles + [merge[0] for merge in plan.merges]:
+        styles.update(file_used_styles(path))
+
+    missing = set()
+    for style in styles:
+        query = index.resolve(style)
+        if query:
+            plan.fonts.add(Path(query.font_face.font_file.filename).name)
+        else:
+            missing.add(style.fontname)
+
+    for fontname in sorted(missing):
+        plan.errors.append(f"Font '{fontname}' was not found")
+
+
+def build_plan(episodes, check_fonts: bool = False):
+    for start, end, _ in MERGE_RULES:
+        if start > end:
+            error(f"Invalid merge range '{start}-{end}' in extras.merge block")
+            sys.exit(1)
+
+    return [plan_episode(ep, check_fonts) for ep in episodes]
+
+
+def print_plan(plans):
+    for plan in plans:
+        status = "FAILED" if plan.errors else "OK"
+        info(f"Episode {plan.episode:02d} [{status}]")
+        if plan.video:
+            info(f"  Video: {log_escape(plan.video.name)}")
+        info(
+            f"  Subtitles: {log_escape(', '.join(sub.name for sub in plan.subtitles))}"
+        )
+        for path, from_marker, to_marker in plan.merges:
+            info(f"  Merge: {log_escape(path.name)} ({from_marker} → {to_marker})")
+        if plan.fonts:
+            info(f"  Fonts: {log_escape(', '.join(sorted(plan.fonts)))}")
+        for message in plan.warnings:
+            warn(f"  {log_escape(message)}")
+        for message in plan.errors:
+            error(f"  {log_escape(message)}")
+
+    failed = sum(1 for plan in plans if plan.errors)
+    info("=" * 70)
+    info(f"Plan: {len(plans)} episode(s), {failed} with errors")
+
+
+def process_episode(plan):
+    ep = plan.episode
+    info("=" * 70)
+    info(f"Processing episode {ep:02d}")
+
+    with profile_stage("setup"):
+        setup = Setup(
+            f"{ep:02d}",
+            config_file="",
+            show_name=CONFIG["show_name"],
+            out_name=rf"[{CONFIG['fansub_group']}] $show$ - $ep$ [{CONFIG['video_resolution']}] [{CONFIG['video_source']}] [$crc32$]",
+            mkv_title_naming=R"$show$ - $ep$ - $title$",
+            out_dir=str(CONFIG["output_path"]),
+            clean_work_dirs=True,
+            error_on_danger=True,
+            work_dir=str(WORK_DIR / f"{ep:02d}"),
+        )
+
+    with profile_stage("glob"):
+        video_file = plan.video
+        setup.set_default_sub_timesource(video_file)
+
+    with profile_stage("premux"):
+        premux = Premux(
+            video_file,
+            subtitles=None,
+            keep_attachments=False,
+            mkvmerge_args=[
+                "--no-global-tags",
+                "--no-chapters",
+                "--language",
+                f"1:{CONFIG['audio_lang_code']}",
+            ],
+        )
+
+    with profile_stage("subtitles"):
+        subtitle = CachedExtrasSubFile(plan.subtitles)
+
+    with profile_stage("chapters"):
+        chapters = Chapters.from_sub(subtitle, use_actor_field=True)
+
+    assemble_subtitles(subtitle, plan)
+
+    with profile_stage("fonts"):
+        fonts = collect_fonts(subtitle)
+        debug(f"Collected {len(fonts)} fonts")
+
+    with profile_stage("mux"):
+        output = mux(
+            premux,
+            subtitle.to_track(CONFIG["sub_language"], CONFIG["sub_lang_code"]),
+            *fonts,
+            chapters,
+            tmdb=CachedTmdbConfig(CONFIG["tmdb_id"]),
+        )
 
     info(f"Episode {ep:02d} muxed successfully.\n")
+    return output
+
+
+def assemble_subtitles(subtitle: SubFile, plan):
+    """
+    Merges the extras into the episode subtitle, adds the credits and
+    applies the final headers. Split out of process_episode so the
+    benchmark times exactly what a mux runs.
+    """
+    with profile_stage("merge"):
+        if plan.merges:
+            for path, from_marker, to_marker in plan.merges:
+                debug(f"Merging extra {path.name}: {from_marker} → {to_marker}")
+                subtitle.merge(
+                    str(path),
+                    from_marker,
+                    to_marker,
+                    no_error=True,
+                    shift_mode=ShiftMode.FRAME,
+                )
+        else:
+            debug(f"No extra merges for episode {plan.episode:02d}")
+
+    with profile_stage("credits"):
+        # Add credits from config.toml to the subtitle file before further processing
+        add_credits(
+            subtitle,
+            CONFIG.get("fansub_group", ""),
+            CONFIG.get("translation", ""),
+            CONFIG.get("editing", ""),
+            CONFIG.get("translation_checking", ""),
+            CONFIG.get("timing", ""),
+            CONFIG.get("typesetting", ""),
+            CONFIG.get("quality_checking", ""),
+        )
+
+    with profile_stage("configure"):
+        # Fonts only come from Dialogue lines, so comments can go before collecting
+        configure_subtitles(subtitle)
 
 
 def add_credits(
@@ -256,15 +1162,14 @@ def add_credits(
         ("Quality Checking", qc),
     ]
 
-    for credit in reversed(credits):
-        sub.manipulate_lines(
-            lambda lines: lines.insert(0, Comment(text=f"{credit[0]}: {credit[1]}"))
-        )
-    for credit in credits:
-        sub.set_header(f"Original {credit[0]}", credit[1])
+    comments = [Comment(text=f"{name}: {value}") for name, value in credits]
+    sub.manipulate_lines(lambda lines: comments + list(lines))
+    sub.set_headers(*((f"Original {name}", value) for name, value in credits))
 
 
 def main():
+    args = parse_arguments()
+    load_project(args.project_path, args.offline)
     validate_paths()
 
     info("=" * 70)
@@ -279,22 +1184,269 @@ def main():
     info(
         f"Paths - Episodes: {CONFIG['episodes_path']} | Extras: {CONFIG['extras_path']} | Output: {CONFIG['output_path']}"
     )
+
+    plans = build_plan(CONFIG["episodes"], check_fonts=args.plan)
+    if args.plan:
+        print_plan(plans)
+        sys.exit(1 if any(plan.errors for plan in plans) else 0)
+
     info("Beginning batch processing...\n")
 
-    for ep in CONFIG["episodes"]:
-        try:
-            process_episode(ep)
-        except Exception as e:
-            error(f"Error processing episode {ep:02d}: {e}")
+    manifest = load_manifest()
+    results = []
+    pending = []
+
+    for plan in plans:
+        ep = plan.episode
+        entry = manifest.get(f"{ep:02d}")
+        for message in plan.warnings:
+            warn(f"Episode {ep:02d}: {log_escape(message)}")
+        if plan.errors:
+            for message in plan.errors:
+                error(f"Episode {ep:02d}: {log_escape(message)}")
+            results.append(
+                {
+                    "episode": ep,
+                    "status": "FAILED",
+                    "error": plan.errors[0],
+                    "elapsed": 0.0,
+                }
+            )
+        elif not args.force and is_up_to_date(entry, plan.fingerprint):
+            info(
+                f"Episode {ep:02d} unchanged, skipping ({log_escape(entry['output'])})"
+            )
+            results.append(
+                {"episode": ep, "status": "SKIPPED", "error": None, "elapsed": 0.0}
+            )
+        else:
+            pending.append(plan)
+
+    if pending:
+        prefetch_tmdb_metadata([plan.episode for plan in pending])
+
+    if args.jobs > 1 and len(pending) > 1:
+        results.extend(
+            run_episodes_parallel(
+                pending, args.jobs, args.offline, args.profile, args.profile_dump
+            )
+        )
+    else:
+        results.extend(
+            run_episode(plan, args.profile, args.profile_dump) for plan in pending
+        )
+    results.sort(key=lambda result: result["episode"])
 
-    work_dir = PROJECT_DIR / "_workdir"
-    if work_dir.exists():
-        shutil.rmtree(work_dir)
+    update_manifest(manifest, plans, results)
+
+    if WORK_DIR.exists():
+        shutil.rmtree(WORK_DIR)
         info("Work directory removed successfully.")
 
     info("=" * 70)
+    print_results_table(results)
+    print_extras_cache_summary(results)
+    if args.profile:
+        write_profile_summary(results)
+        print_profile_percentiles(results)
+
+    failed = [result["episode"] for result in results if result["status"] == "FAILED"]
+    if failed:
+        error(
+            f"{len(failed)} episode(s) failed: {', '.join(f'{ep:02d}' for ep in failed)}"
+        )
+        sys.exit(1)
+
     info("All episodes processed successfully.")
 
 
+def run_episode(plan, profile: bool = False, profile_dump: bool = False):
+    """
+    Muxes one episode and returns a result dict with its status, error
+    message, elapsed seconds and output file name.
+    Errors are logged and returned so one episode never aborts the batch.
+    profile records stage timings, profile_dump also writes a cProfile
+    dump of the episode.
+    """
+    global EPISODE_PROFILE
+
+    ep = plan.episode
+    EPISODE_LOG_FILTER.episode = ep
+    if profile:
+        EPISODE_PROFILE = EpisodeProfile(ep)
+    profiler = cProfile.Profile() if profile_dump else None
+
+    start = time.perf_counter()
+    result = {"episode": ep, "status": "OK", "error": None, "output": None}
+
+    try:
+        if profiler:
+            profiler.enable()
+        result["output"] = Path(process_episode(plan)).name
+    except Exception as e:
+        result["status"] = "FAILED"
+        result["error"] = str(e) or e.__class__.__name__
+        error(f"Error processing episode {ep:02d}: {e}")
+    finally:
+        if profiler:
+            profiler.disable()
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(PROFILE_DIR / f"{ep:02d}.prof")
+        EPISODE_LOG_FILTER.episode = None
+
+    result["elapsed"] = time.perf_counter() - start
+    result["extras_cache"] = EXTRAS_CACHE.take_stats()
+    if EPISODE_PROFILE is not None:
+        result["profile"] = EPISODE_PROFILE.stages
+        EPISODE_PROFILE = None
+    return result
+
+
+def run_episodes_parallel(
+    plans,
+    jobs: int,
+    offline: bool = False,
+    profile: bool = False,
+    profile_dump: bool = False,
+):
+    info(f"Muxing {len(plans)} episodes with {jobs} workers")
+    results = []
+
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=load_project, initargs=(PROJECT_DIR, offline)
+    ) as executor:
+        futures = {
+            executor.submit(run_episode, plan, profile, profile_dump): plan.episode
+            for plan in plans
+        }
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # The worker process itself died (e.g. killed or out of memory)
+                ep = futures[future]
+                error(f"Worker for episode {ep:02d} crashed: {e}")
+                results.append(
+                    {"episode": ep, "status": "FAILED", "error": str(e), "elapsed": 0.0}
+                )
+
+    return results
+
+
+def update_manifest(manifest, plans, results):
+    """
+    Records the fingerprint and output of every episode muxed in this run.
+    The previous output of a re-muxed episode is removed, since its name
+    carries the old CRC32 and would otherwise be left next to the new one.
+    """
+    fingerprints = {plan.episode: plan.fingerprint for plan in plans}
+    updated = False
+    for result in results:
+        if result["status"] != "OK":
+            continue
+
+        key = f"{result['episode']:02d}"
+        previous = manifest.get(key, {}).get("output")
+        if previous and previous != result["output"]:
+            stale_file = CONFIG["output_path"] / previous
+            if stale_file.exists():
+                debug(f"Removing previous output {log_escape(previous)}")
+                stale_file.unlink()
+
+        manifest[key] = {
+            "fingerprint": fingerprints[result["episode"]],
+            "output": result["output"],
+        }
+        updated = True
+
+    if updated:
+        save_manifest(manifest)
+
+
+def print_results_table(results):
+    info(f"{'Episode':<9}{'Status':<9}{'Time':>9}")
+    for result in results:
+        line = f"{result['episode']:02d}{'':<7}{result['status']:<9}{result['elapsed']:>8.1f}s"
+        if result["error"]:
+            line += f"  {log_escape(result['error'])}"
+        info(line)
+
+
+def print_extras_cache_summary(results):
+    totals = {"parsed": 0, "reused": 0, "parse_time": 0.0, "saved_time": 0.0}
+    for result in results:
+        for key, value in result.get("extras_cache", {}).items():
+            totals[key] += value
+
+    if totals["parsed"] or totals["reused"]:
+        info(
+            f"Extras: {totals['parsed']} parsed in {totals['parse_time']:.2f}s, "
+            f"{totals['reused']} reused from cache "
+            f"(~{totals['saved_time']:.2f}s of parsing saved)"
+        )
+
+
+def write_profile_summary(results):
+    profiled = [result for result in results if "profile" in result]
+    if not profiled:
+        return
+
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    summary = [
+        {
+            "episode": result["episode"],
+            "status": result["status"],
+            "elapsed": result["elapsed"],
+            "stages": result["profile"],
+        }
+        for result in profiled
+    ]
+    with open(PROFILE_DIR / "profile.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    with open(PROFILE_DIR / "profile.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("episode", "stage") + PROFILE_FIELDS)
+        for result in profiled:
+            for stage in result["profile"]:
+                writer.writerow(
+                    [f"{result['episode']:02d}", stage["stage"]]
+                    + [stage[field] for field in PROFILE_FIELDS]
+                )
+
+    info(f"Profile written to {log_escape(str(PROFILE_DIR))}")
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a non-empty list.
+    """
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def print_profile_percentiles(results):
+    walls = {}
+    peak_rss = 0.0
+    for result in results:
+        for stage in result.get("profile", []):
+            walls.setdefault(stage["stage"], []).append(stage["wall"])
+            peak_rss = max(peak_rss, stage["peak_rss_so_far_mb"])
+        if "profile" in result:
+            walls.setdefault("total", []).append(result["elapsed"])
+
+    if not walls:
+        return
+
+    info(f"{'Stage':<12}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    for name, values in walls.items():
+        line = "".join(f"{percentile(values, pct):>8.2f}s" for pct in (50, 90, 99, 100))
+        info(f"{name:<12}{line}")
+    # Every stage holds its process's peak so far, so the largest is the
+    # peak of the biggest single process, not a sum over the workers
+    info(f"Peak RSS of any one process: {peak_rss:.1f} MB")
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,197 @@
+import sys
+import argparse
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+from ass_events import read_ass_source, write_ass_source
+
+GARBAGE_SECTION = "[Aegisub Project Garbage]"
+# Extradata holds the {=N} line metadata Aegisub tools like perspective
+# motion rely on, so it is only dropped on request
+EXTRADATA_SECTION = "[Aegisub Extradata]"
+REMOVED_HEADERS = (
+    "Title:",
+    "Original Script:",
+    "Original Translation:",
+    "Original Editing:",
+    "Original Timing:",
+    "Synch Point:",
+    "Script Updated By:",
+)
+WRAP_STYLE = "WrapStyle: 0"
+
+# Below this many files a process pool costs more than it saves
+PARALLEL_THRESHOLD = 8
+
+
+def line_ending(line):
+    if line.endswith("\r\n"):
+        return "\r\n"
+    if line.endswith("\n"):
+        return "\n"
+    return ""
+
+
+def is_wrap_style(line):
+    if not line.startswith("WrapStyle:"):
+        return False
+    return line[len("WrapStyle:") :].lstrip(" \t")[:1].isdigit()
+
+
+def normalize_lines(lines, strip_extradata=False):
+    """
+    Drops the Aegisub garbage section (and the extradata section when
+    asked to) and the metadata headers, and sets WrapStyle to 0.
+    Line endings are kept as they are.
+    """
+    removed_sections = (GARBAGE_SECTION,)
+    if strip_extradata:
+        removed_sections += (EXTRADATA_SECTION,)
+
+    cleaned = []
+    in_removed_section = False
+
+    for line in lines:
+        stripped = line.rstrip("\r\n")
+
+        if stripped.startswith("["):
+            in_removed_section = stripped in removed_sections
+            if in_removed_section:
+                continue
+
+        if in_removed_section or stripped.startswith(REMOVED_HEADERS):
+            continue
+
+        if is_wrap_style(stripped):
+            line = WRAP_STYLE + line_ending(line)
+
+        cleaned.append(line)
+
+    return cleaned
+
+
+def normalize_file(file_path, check=False, strip_extradata=False):
+    """
+    Normalizes a file in place.
+    Returns True if the file needed changes; files that are already
+    clean are never written.
+    """
+    lines, encoding = read_ass_source(file_path)
+    if encoding is None:
+        return False
+
+    cleaned = normalize_lines(lines, strip_extradata)
+    if cleaned == lines:
+        return False
+
+    if not check:
+        write_ass_source(file_path, cleaned, encoding)
+    return True
+
+
+def _normalize_worker(args):
+    file_path, check, strip_extradata = args
+    return file_path, normalize_file(file_path, check, strip_extradata)
+
+
+def normalize_files(file_paths, check=False, strip_extradata=False, jobs=None):
+    """
+    Yields (file_path, changed) for every file, in the given order.
+    """
+    tasks = [(file_path, check, strip_extradata) for file_path in file_paths]
+    if jobs == 1 or len(tasks) < PARALLEL_THRESHOLD:
+        yield from map(_normalize_worker, tasks)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(_normalize_worker, tasks, chunksize=4)
+
+
+def staged_ass_files():
+    output = subprocess.run(
+        [
+            "git",
+            "diff",
+            "--cached",
+            "--name-only",
+            "--diff-filter=ACMR",
+            "-z",
+            "--",
+            "*.ass",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return [name for name in output.split("\0") if name]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Remove Aegisub garbage and metadata from .ass files and set WrapStyle to 0",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python normalize-ass.py                      (staged files, used by the pre-commit hook)
+  python normalize-ass.py episodes/01/*.ass
+  python normalize-ass.py --check episodes/*/*.ass
+
+Removed:
+  [Aegisub Project Garbage] section
+  [Aegisub Extradata] section (only with --strip-extradata)
+  Title, Original Script/Translation/Editing/Timing, Synch Point
+  and Script Updated By headers
+
+Exit Codes:
+  0 - Success
+  1 - Some files need cleaning (only with --check)
+        """,
+    )
+
+    parser.add_argument(
+        "files",
+        nargs="*",
+        help="Files to normalize (default: staged .ass files, which are re-added)",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only report files that need cleaning, without writing them",
+    )
+    parser.add_argument(
+        "--strip-extradata",
+        action="store_true",
+        help="Also remove the [Aegisub Extradata] section",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker processes (default: one per CPU)",
+    )
+
+    args = parser.parse_args()
+
+    staged = not args.files
+    file_paths = staged_ass_files() if staged else args.files
+
+    changed = []
+    for file_path, was_changed in normalize_files(
+        file_paths, args.check, args.strip_extradata, args.jobs
+    ):
+        if was_changed:
+            changed.append(file_path)
+            if args.check:
+                print(f"✗ Needs cleaning: {file_path}")
+            else:
+                print(f"✓ Cleaned metadata from: {file_path}")
+
+    if staged and changed and not args.check:
+        subprocess.run(["git", "add", "--", *changed], check=True)
+
+    sys.exit(1 if args.check and changed else 0)
+
+
+if __name__ == "__main__":
+    main()